@@ -1,4 +1,7 @@
+import socket
 import time
+from src.Scanners.port_scanner import scan_ports
+from src.Scanners.async_port_scanner import scan_ports as scan_ports_async
 from src.Scanners.ssl_checker import scan_subdomains
 from src.Scanners.tech_scanner import detect_technologies
 
@@ -23,3 +26,12 @@ detect_technologies(example_domains, workers=10)
 async_time = time.perf_counter() - start
 print(f"Sequential: {seq:.2f}s, Async: {async_time:.2f}s")
 
+print("\nBenchmarking port scan engines...")
+port_assets = [{"subdomain": d, "ip": socket.gethostbyname(d)} for d in example_domains]
+start = time.perf_counter()
+scan_ports(port_assets, ports="1-100", workers=10)
+nmap_time = time.perf_counter() - start
+start = time.perf_counter()
+scan_ports_async(port_assets, ports="1-100", workers=300)
+async_time = time.perf_counter() - start
+print(f"Nmap: {nmap_time:.2f}s, Async connect: {async_time:.2f}s")
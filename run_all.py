@@ -1,20 +1,72 @@
 import argparse
 
-from src.Scanners.run_scanners import run_all
+from src.Scanners.run_scanners import PORT_ENGINES, load_domains, run_all, run_batch, run_worker
+from src.utils import config, helpers, scheduler
+from src.utils.work_queue import WorkQueue
 
 
 def main():
     parser = argparse.ArgumentParser(
         description="Run all scanners for a target domain.")
-    parser.add_argument("--domain", required=True,
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--domain",
                         help="Target root domain (e.g. example.com)")
+    target.add_argument("--domains-file",
+                        help="File with one target domain per line to scan in one process")
+    target.add_argument("--worker", action="store_true",
+                        help="Scan work units from --queue until stopped")
     parser.add_argument("--ports", default="1-100",
                         help="Port range to scan (default: 1-100)")
     parser.add_argument("--workers", type=int, default=100,
                         help="Concurrent connections")
+    parser.add_argument("--engine", choices=PORT_ENGINES, default="nmap",
+                        help="Port scan engine: nmap or asyncio TCP connect")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream resolved assets straight into the scanners")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse fresh results from the previous run and save a diff")
+    parser.add_argument("--freshness", type=float, default=24,
+                        help="Hours previous results stay fresh in incremental mode")
+    parser.add_argument("--rate", type=float, default=config.GLOBAL_RATE,
+                        help="Requests per second across all targets (0 = unlimited)")
+    parser.add_argument("--per-ip-rate", type=float, default=config.PER_IP_RATE,
+                        help="Requests per second against one IP (0 = unlimited)")
+    parser.add_argument("--parallel-domains", type=int, default=config.BATCH_DOMAINS,
+                        help="Domains scanned at once with --domains-file")
+    parser.add_argument("--distributed", action="store_true",
+                        help="Coordinate only: queue work units for --worker processes")
+    parser.add_argument("--queue", default=str(config.WORK_QUEUE_FILE),
+                        help="SQLite work queue shared by coordinator and workers")
+    parser.add_argument("--exit-when-idle", action="store_true",
+                        help="Stop the worker once the queue is empty")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted scan from its journal")
+    parser.add_argument("--output-format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Write results as indented JSON or (gzipped) JSON Lines")
     args = parser.parse_args()
 
-    results = run_all(args.domain, ports=args.ports, workers=args.workers)
+    scheduler.configure(args.rate, args.per_ip_rate)
+
+    if args.worker:
+        completed = run_worker(WorkQueue(args.queue), exit_when_idle=args.exit_when_idle)
+        print(f"\nCompleted {completed} work units")
+        return
+
+    options = dict(ports=args.ports, workers=args.workers, engine=args.engine,
+                   stream=args.stream, incremental=args.incremental,
+                   freshness_hours=args.freshness, resume=args.resume,
+                   output_format=args.output_format,
+                   queue=WorkQueue(args.queue) if args.distributed else None)
+    if args.domains_file:
+        batch = run_batch(load_domains(args.domains_file),
+                          parallel=args.parallel_domains, **options)
+        for domain, files in batch.items():
+            print(f"\n{domain}:")
+            for key, path in files.items():
+                print(f" - {key}: {path}")
+        return
+
+    results = run_all(args.domain, **options)
 
     if isinstance(results, dict):
         print("\nGenerated files:")
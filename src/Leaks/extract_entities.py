@@ -1,81 +1,113 @@
-import json
 import os
-import re
-import spacy
 from collections import defaultdict
 from tqdm import tqdm
 
-# Load SpaCy NER model
-nlp = spacy.load("en_core_web_sm")
+from src.Leaks.patterns import ENTITIES
+from src.utils import config, helpers
+from src.utils.nlp_loader import load_spacy
+
+# Only the NER labels below are used, so skip the components NER does not need
+NER_LABELS = {"PERSON", "ORG", "GPE"}
+UNUSED_PIPES = ["parser", "lemmatizer", "tagger", "attribute_ruler"]
+
+
+def get_nlp():
+    """SpaCy NER pipeline, loaded on first use and shared through ``nlp_loader``."""
+    return load_spacy(config.SPACY_MODEL, UNUSED_PIPES)
 
 # Input/output files
 INPUT_FILE = "data/classified_leaks.json"
 OUTPUT_FILE = "data/extracted_entities.json"
 
-# Regex patterns
-EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
-PHONE_REGEX = r"(?:(?:\+?91)|(?:\(\+91\))|(?:0))?[\s-]?[789]\d{9}"
-IP_REGEX = r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
-URL_REGEX = r"https?://(?:www\.)?[a-zA-Z0-9./?=#-_]+"
-CRED_REGEX = r'(?i)(username|password|pass|login)[\'":\s]+([a-zA-Z0-9@#$_!%^&*\-+=]+)'
-
 
 def extract_with_regex(text):
-    entities = defaultdict(set)
-    entities["emails"].update(re.findall(EMAIL_REGEX, text))
-    entities["phones"].update(re.findall(PHONE_REGEX, text))
-    entities["ips"].update(re.findall(IP_REGEX, text))
-    entities["urls"].update(re.findall(URL_REGEX, text))
-    entities["credentials"].update(match[1] for match in re.findall(CRED_REGEX, text))
+    entities = defaultdict(set, {kind: set() for kind in ENTITIES.kinds})
+    for match in ENTITIES.finditer(text):
+        entities[match.kind].add(match.value)
     return entities
 
 
-def extract_with_ner(text):
-    doc = nlp(text)
+def entities_from_doc(doc):
     entities = defaultdict(set)
     for ent in doc.ents:
-        if ent.label_ in ["PERSON", "ORG", "GPE"]:
+        if ent.label_ in NER_LABELS:
             entities[ent.label_.lower()].add(ent.text)
     return entities
 
 
+def extract_with_ner(text):
+    return entities_from_doc(get_nlp()(text))
+
+
 def merge_entities(e1, e2):
     for key, val in e2.items():
         e1[key].update(val)
     return e1
 
 
-def extract_entities():
-    if not os.path.exists(INPUT_FILE):
-        print(f"[-] Input file not found: {INPUT_FILE}")
-        return
-
-    with open(INPUT_FILE, "r") as f:
-        leaks = json.load(f)
-
-    output = []
-
-    for entry in tqdm(leaks, desc="[+] Extracting entities"):
-        if entry.get("label") != "sensitive":
-            continue
-
-        text = entry.get("text", "")
+def iter_extracted(leaks, batch_size=config.NER_BATCH_SIZE, n_process=config.NER_PROCESSES,
+                   regex_only=False):
+    """Yield an entity record for every sensitive leak, in input order.
+
+    Texts go through ``nlp.pipe`` in batches of ``batch_size`` spread over
+    ``n_process`` worker processes; regex extraction runs on each result.
+    With ``regex_only`` spaCy is never loaded and only regex entities are found.
+    """
+    sensitive = (
+        (entry.get("text", ""), entry) for entry in leaks if entry.get("label") == "sensitive"
+    )
+    if regex_only:
+        docs = ((None, text, entry) for text, entry in sensitive)
+    else:
+        piped = get_nlp().pipe(sensitive, as_tuples=True, batch_size=batch_size,
+                               n_process=n_process)
+        docs = ((doc, doc.text, entry) for doc, entry in piped)
+    for doc, text, entry in docs:
         entity_block = defaultdict(set)
-
         entity_block = merge_entities(entity_block, extract_with_regex(text))
-        entity_block = merge_entities(entity_block, extract_with_ner(text))
+        if doc is not None:
+            entity_block = merge_entities(entity_block, entities_from_doc(doc))
 
-        output.append({
+        yield {
             "source": entry.get("source"),
             "subdomain": entry.get("subdomain"),
             "entities": {k: list(v) for k, v in entity_block.items()}
-        })
+        }
+
+
+def extract_entities(input_file=INPUT_FILE, output_file=OUTPUT_FILE,
+                     batch_size=config.NER_BATCH_SIZE, n_process=config.NER_PROCESSES,
+                     regex_only=False):
+    if not os.path.exists(input_file):
+        print(f"[-] Input file not found: {input_file}")
+        return
+
+    leaks = helpers.iter_records(input_file)
+    output = tqdm(iter_extracted(leaks, batch_size, n_process, regex_only),
+                  desc="[+] Extracting entities")
 
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(output, f, indent=2)
+    if helpers.is_jsonl(output_file):
+        with helpers.JsonlWriter(output_file) as writer:
+            writer.write_many(output)
+    else:
+        helpers.save_json(list(output), output_file)
 
-    print(f"[+] Extracted entities saved to {OUTPUT_FILE}")
+    print(f"[+] Extracted entities saved to {output_file}")
 
 
 if __name__ == "__main__":
-    extract_entities()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract entities from sensitive leaks")
+    parser.add_argument("--input", default=INPUT_FILE, help="Classified leaks JSON or JSONL")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Path to save extracted entities")
+    parser.add_argument("--batch-size", type=int, default=config.NER_BATCH_SIZE,
+                        help="Texts per spaCy batch")
+    parser.add_argument("--n-process", type=int, default=config.NER_PROCESSES,
+                        help="spaCy worker processes; each loads its own model copy, "
+                             "so only raise this for large inputs")
+    parser.add_argument("--regex-only", action="store_true",
+                        help="Skip spaCy NER and only extract regex entities")
+    args = parser.parse_args()
+
+    extract_entities(args.input, args.output, args.batch_size, args.n_process, args.regex_only)
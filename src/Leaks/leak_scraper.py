@@ -1,6 +1,4 @@
 import os
-import re
-import json
 import time
 import argparse
 import requests
@@ -9,6 +7,9 @@ from urllib.robotparser import RobotFileParser
 from datetime import datetime
 from urllib.parse import urljoin
 
+from src.Leaks.patterns import LEAK_TYPES
+from src.utils import helpers
+
 BASE_URL = "https://paste.ee"
 LATEST_PASTES_URL = "https://paste.ee/latest"
 DATA_DIR = "data"
@@ -51,13 +52,7 @@ def extract_leaks(text, domain, source="unknown"):
     return leaks
 
 def classify_leak(line):
-    if re.search(r"(password|pwd)[=: ]", line, re.IGNORECASE):
-        return "credentials"
-    elif re.search(r"(key|token|secret)[=: ]", line, re.IGNORECASE):
-        return "api_key"
-    elif re.search(r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+", line):
-        return "email"
-    return "unknown"
+    return LEAK_TYPES.first_kind(line, default="unknown")
 
 def scrape_online(domain):
     if not can_scrape(LATEST_PASTES_URL):
@@ -91,9 +86,7 @@ def process_offline_samples(domain):
     return leaks
 
 def save_to_json(data, output_path):
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    helpers.save_json(data, output_path)
     print(f"[✓] Saved {len(data)} leaks to {output_path}")
 
 if __name__ == "__main__":
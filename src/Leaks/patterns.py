@@ -0,0 +1,94 @@
+"""Precompiled multi-pattern matching for leak text.
+
+A :class:`PatternSet` holds its patterns compiled once, each with the
+literals one of which must occur in any text it can match (``@`` for an
+email, a digit for an IP address, ...). Before a pattern scans a text a
+substring check for those literals decides whether it can match at all,
+so on large dumps most patterns never run over most lines. Every hit comes
+back as a :class:`TypedMatch` naming the pattern that produced it.
+"""
+from __future__ import annotations
+
+import re
+from typing import Iterator, NamedTuple
+
+DIGITS = tuple("0123456789")
+
+# Entity patterns
+EMAIL_REGEX = r"[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+"
+PHONE_REGEX = r"(?:(?:\+?91)|(?:\(\+91\))|(?:0))?[\s-]?[789]\d{9}"
+IP_REGEX = r"\b(?:\d{1,3}\.){3}\d{1,3}\b"
+URL_REGEX = r"https?://(?:www\.)?[a-zA-Z0-9./?=#-_]+"
+CRED_REGEX = r'(?i)(?:username|password|pass|login)[\'":\s]+(?P<value>[a-zA-Z0-9@#$_!%^&*\-+=]+)'
+
+# Leak type patterns
+CREDENTIALS_REGEX = r"(?i)(?:password|pwd)[=: ]"
+API_KEY_REGEX = r"(?i)(?:key|token|secret)[=: ]"
+
+
+class TypedMatch(NamedTuple):
+    kind: str
+    value: str
+    start: int
+    end: int
+
+
+class PatternSet:
+    """Named regex patterns, compiled once and prefiltered by required literals.
+
+    ``patterns`` maps each kind to ``(regex, literals)``: the pattern only
+    runs over texts containing at least one of ``literals`` (compared in
+    case-folded form for case-insensitive patterns; empty means always run). A
+    pattern with a group named ``value`` reports that group, otherwise the
+    whole match.
+    """
+
+    def __init__(self, patterns: dict[str, tuple[str, tuple[str, ...]]]):
+        self.kinds = tuple(patterns)
+        self._patterns = []
+        for kind, (pattern, literals) in patterns.items():
+            regex = re.compile(pattern)
+            group = "value" if "value" in regex.groupindex else 0
+            folded = bool(regex.flags & re.IGNORECASE)
+            self._patterns.append((kind, regex, group, tuple(literals), folded))
+
+    def _candidates(self, text: str):
+        """Yield ``(kind, regex, group)`` for the patterns whose literals occur in ``text``."""
+        lowered = None
+        for kind, regex, group, literals, folded in self._patterns:
+            haystack = text
+            if folded:
+                if lowered is None:
+                    lowered = text.casefold()
+                haystack = lowered
+            if not literals or any(literal in haystack for literal in literals):
+                yield kind, regex, group
+
+    def finditer(self, text: str) -> Iterator[TypedMatch]:
+        """Yield every match in ``text``, grouped by kind in pattern order."""
+        for kind, regex, group in self._candidates(text):
+            for m in regex.finditer(text):
+                yield TypedMatch(kind, m.group(group), *m.span(group))
+
+    def first_kind(self, text: str, default=None):
+        """Return the first kind, in pattern order, with a match in ``text``."""
+        for kind, regex, _ in self._candidates(text):
+            if regex.search(text):
+                return kind
+        return default
+
+
+ENTITIES = PatternSet({
+    "emails": (EMAIL_REGEX, ("@",)),
+    "phones": (PHONE_REGEX, ("7", "8", "9")),
+    "ips": (IP_REGEX, DIGITS),
+    "urls": (URL_REGEX, ("http",)),
+    "credentials": (CRED_REGEX, ("username", "pass", "login")),
+})
+
+# In order of precedence
+LEAK_TYPES = PatternSet({
+    "credentials": (CREDENTIALS_REGEX, ("password", "pwd")),
+    "api_key": (API_KEY_REGEX, ("key", "token", "secret")),
+    "email": (EMAIL_REGEX, ("@",)),
+})
@@ -0,0 +1,156 @@
+"""Local inference server that keeps models warm between calls.
+
+Run ``python -m src.ML.inference_server`` and point ``leak_classifier``
+or ``risk_model`` at it with ``--server http://127.0.0.1:8765``. Models are
+loaded through the model registry on first use and reloaded only when their
+files change. Endpoints (JSON in, JSON out):
+
+    GET  /health    -> {"status": "ok"}
+    POST /classify  {"texts": [...]} -> {"labels": [...]}
+    POST /risk      {"assets", "ports", "ssl", "leaks", "model"} -> {"scores": [...]}
+
+The server has no authentication, so it trusts nothing in a request: the
+``/risk`` model is a file name looked up in ``config.MODELS_DIR`` (models
+are pickles, and loading one runs code), result files must lie inside one
+of the server's data directories, and only ``application/json`` bodies are
+accepted so a web page cannot post to it without a CORS preflight.
+"""
+import argparse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from src.utils import config, serializer
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def model_path(name, models_dir=config.MODELS_DIR):
+    """Resolve a model file name under ``models_dir``; paths are rejected."""
+    if not isinstance(name, str) or not name or Path(name).name != name or name in (".", ".."):
+        raise PermissionError(f"Model must be a file name in {models_dir}: {name!r}")
+    path = Path(models_dir) / name
+    if not path.is_file():
+        raise PermissionError(f"No such model in {models_dir}: {name}")
+    return path
+
+
+def data_path(value, data_dirs):
+    """Resolve ``value`` and check that it lies inside one of ``data_dirs``."""
+    path = Path(value).resolve()
+    if not any(path == d or d in path.parents for d in data_dirs):
+        raise PermissionError(f"Path is outside the data directories: {value}")
+    return path
+
+
+def _handle_classify(server, body):
+    from src.ML.leak_classifier import predict_labels
+
+    return {"labels": predict_labels(body["texts"])}
+
+
+def _handle_risk(server, body):
+    from src.ML.risk_model import calculate_risk_scores
+
+    files = [data_path(body[key], server.data_dirs) for key in ("assets", "ports", "ssl", "leaks")]
+    scores = calculate_risk_scores(*files, model_path(body["model"], server.models_dir))
+    return {"scores": scores}
+
+
+ROUTES = {"/classify": _handle_classify, "/risk": _handle_risk}
+
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, payload):
+        data = serializer.dumps(payload)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {"status": "ok"})
+        else:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+
+    def do_POST(self):
+        handler = ROUTES.get(self.path)
+        if handler is None:
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        if self.headers.get_content_type() != "application/json":
+            self._reply(415, {"error": "Content-Type must be application/json"})
+            return
+        try:
+            body = serializer.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            self._reply(200, handler(self.server, body))
+        except PermissionError as e:
+            self._reply(403, {"error": str(e)})
+        except (KeyError, TypeError, ValueError) as e:
+            self._reply(400, {"error": f"Bad request: {e}"})
+        except Exception as e:
+            logger.exception(f"Inference failed on {self.path}")
+            self._reply(500, {"error": str(e)})
+
+    def log_message(self, format, *args):
+        logger.debug(f"{self.address_string()} {format % args}")
+
+
+def create_server(host: str = config.INFERENCE_HOST, port: int = config.INFERENCE_PORT,
+                  data_dirs=None, models_dir=config.MODELS_DIR):
+    """Create the server; ``/risk`` only reads files under ``data_dirs``.
+
+    ``data_dirs`` defaults to ``config.DATA_DIR`` and ``./data``, where the
+    scanners write their results.
+    """
+    server = ThreadingHTTPServer((host, port), InferenceHandler)
+    dirs = data_dirs if data_dirs is not None else [config.DATA_DIR, "data"]
+    server.data_dirs = [Path(d).resolve() for d in dirs]
+    server.models_dir = Path(models_dir)
+    return server
+
+
+def _post(url, path, payload):
+    request = urllib.request.Request(
+        url.rstrip("/") + path, data=serializer.dumps(payload),
+        headers={"Content-Type": "application/json"}, method="POST",
+    )
+    with urllib.request.urlopen(request) as response:
+        return serializer.loads(response.read())
+
+
+def remote_classify(url, texts):
+    """Classify ``texts`` on the inference server at ``url``."""
+    return _post(url, "/classify", {"texts": list(texts)})["labels"]
+
+
+def remote_risk_scores(url, assets, ports, ssl, leaks, model):
+    """Score assets on the inference server at ``url`` from result file paths.
+
+    The result files must be inside the server's data directories and
+    ``model`` names a file in its models directory.
+    """
+    payload = {"assets": assets, "ports": ports, "ssl": ssl, "leaks": leaks, "model": model}
+    return _post(url, "/risk", payload)["scores"]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local inference server with warm models")
+    parser.add_argument("--host", default=config.INFERENCE_HOST, help="Address to bind")
+    parser.add_argument("--port", type=int, default=config.INFERENCE_PORT, help="Port to listen on")
+    parser.add_argument("--data-dir", action="append", dest="data_dirs",
+                        help="Directory /risk may read result files from (repeatable; "
+                             "default: the configured data dir and ./data)")
+    args = parser.parse_args()
+
+    server = create_server(args.host, args.port, args.data_dirs)
+    logger.info(f"Inference server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
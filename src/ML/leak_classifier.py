@@ -1,6 +1,9 @@
-import joblib
+from __future__ import annotations
+
+from itertools import islice
 from pathlib import Path
 
+from src.ML.model_registry import load_model
 from src.utils import config, helpers
 from src.utils.logger import get_logger
 
@@ -8,32 +11,71 @@ logger = get_logger(__name__)
 
 DEFAULT_INPUT = config.DATA_DIR / "leaks.json"
 DEFAULT_OUTPUT = config.DATA_DIR / "classified_leaks.json"
+LEAK_MODEL = config.MODELS_DIR / "leak_model.pkl"
+VECTORIZER = config.MODELS_DIR / "vectorizer.pkl"
+
+
+def batched(iterable, size: int):
+    """Yield lists of up to ``size`` items from ``iterable``."""
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def predict_labels(texts):
+    """Classify ``texts`` with the leak model and vectorizer from the model registry."""
+    clf, vectorizer = load_model(LEAK_MODEL), load_model(VECTORIZER)
+    return clf.predict(vectorizer.transform(texts)).tolist()
+
+
+def iter_classified(leaks, predict=predict_labels, batch_size: int = config.LEAK_BATCH_SIZE):
+    """Label ``leaks`` lazily, one sparse batch of ``batch_size`` entries at a time."""
+    for batch in batched(leaks, batch_size):
+        for entry, label in zip(batch, predict([entry["content"] for entry in batch])):
+            entry["label"] = label
+            yield entry
+
 
+def classify_leaks(input_path: Path = DEFAULT_INPUT, output_path: Path = DEFAULT_OUTPUT,
+                   batch_size: int = config.LEAK_BATCH_SIZE, server: str | None = None) -> None:
+    """Load leaks, apply the classifier and save labeled results.
 
-def classify_leaks(input_path: Path = DEFAULT_INPUT, output_path: Path = DEFAULT_OUTPUT) -> None:
-    """Load leaks, apply the classifier and save labeled results."""
-    clf = joblib.load(config.MODELS_DIR / "leak_model.pkl")
-    vectorizer = joblib.load(config.MODELS_DIR / "vectorizer.pkl")
+    Entries are vectorised and classified in batches of ``batch_size``. With
+    JSON Lines input and output (``.jsonl``/``.jsonl.gz``) both sides are
+    streamed, so memory stays bounded by one batch however large the dump.
+    Pass the URL of a running inference server as ``server`` to classify
+    there instead of loading the models in this process.
+    """
+    if server:
+        from src.ML.inference_server import remote_classify
 
-    leaks = helpers.load_json(input_path, default=[])
-    classified = []
-    for entry in leaks:
-        text = entry["content"]
-        X = vectorizer.transform([text])
-        pred = clf.predict(X)[0]
-        entry["label"] = pred
-        classified.append(entry)
+        def predict(texts):
+            return remote_classify(server, texts)
+    else:
+        predict = predict_labels
 
-    helpers.save_json(classified, output_path)
-    logger.info(f"Classified {len(classified)} leaks and saved to {output_path}")
+    classified = iter_classified(helpers.iter_records(input_path), predict, batch_size)
+    if helpers.is_jsonl(output_path):
+        with helpers.JsonlWriter(output_path) as writer:
+            writer.write_many(classified)
+        count = writer.count
+    else:
+        classified = list(classified)
+        helpers.save_json(classified, output_path)
+        count = len(classified)
+    logger.info(f"Classified {count} leaks and saved to {output_path}")
 
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Classify leaked data")
-    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="Path to leak JSON")
-    parser.add_argument("--output", default=str(DEFAULT_OUTPUT), help="Path to save labeled JSON")
+    parser.add_argument("--input", default=str(DEFAULT_INPUT), help="Path to leak JSON or JSONL")
+    parser.add_argument("--output", default=str(DEFAULT_OUTPUT),
+                        help="Path to save labeled JSON (.jsonl/.jsonl.gz streams output)")
+    parser.add_argument("--batch-size", type=int, default=config.LEAK_BATCH_SIZE,
+                        help="Entries vectorised and classified per batch")
+    parser.add_argument("--server", help="URL of a running inference server to classify with")
     args = parser.parse_args()
 
-    classify_leaks(Path(args.input), Path(args.output))
+    classify_leaks(Path(args.input), Path(args.output), args.batch_size, args.server)
@@ -0,0 +1,49 @@
+import threading
+from pathlib import Path
+
+import joblib
+
+from src.utils import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ModelRegistry:
+    """Process-wide cache of joblib models keyed by path.
+
+    Each model is loaded once and reused until its file's mtime or size
+    changes. With ``mmap_mode`` large numpy arrays inside uncompressed
+    pickles are memory-mapped so forked workers share pages instead of
+    copying them; model files must then be replaced, never rewritten in place.
+    """
+
+    def __init__(self, mmap_mode=config.MODEL_MMAP_MODE):
+        self.mmap_mode = mmap_mode
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        path = Path(path).resolve()
+        stat = path.stat()
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._models.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+            logger.info(f"Loading model {path}")
+            model = joblib.load(path, mmap_mode=self.mmap_mode)
+            self._models[path] = (stamp, model)
+            return model
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+
+registry = ModelRegistry()
+
+
+def load_model(path):
+    """Return the model stored at ``path`` from the shared registry."""
+    return registry.get(path)
@@ -1,21 +1,47 @@
-import json
 import os
 import argparse
-import joblib
+import threading
+
 import numpy as np
 
+from src.ML.model_registry import load_model
+from src.Scanners.cert_store import expand_results
+from src.utils import helpers
+
+
+# Result files can be hundreds of MB, so only the latest version of the
+# files used by the last scoring (assets, ports, SSL, leaks) is kept
+RECORDS_CACHE_FILES = 4
+_records = {}
+_records_lock = threading.Lock()
+
 
 def load_json(path):
-    if os.path.exists(path):
-        with open(path, "r") as f:
-            return json.load(f)
-    return []
+    """Load a JSON or JSON Lines result file.
+
+    Parsed files are kept while their size and mtime are unchanged, so the
+    dashboard can recompute scores without parsing the same files again.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return []
+    path, stamp = str(path), (stat.st_mtime_ns, stat.st_size)
+    with _records_lock:
+        # Drop an outdated copy before parsing the new one
+        cached = _records.pop(path, None)
+        if cached is None or cached[0] != stamp:
+            cached = (stamp, helpers.load_records(path, default=[]))
+        _records[path] = cached
+        while len(_records) > RECORDS_CACHE_FILES:
+            del _records[next(iter(_records))]
+        return cached[1]
 
 
 def build_features(asset_file, ports_file, ssl_file, leaks_file):
     assets = load_json(asset_file)
     ports_data = load_json(ports_file)
-    ssl_data = load_json(ssl_file)
+    ssl_data = expand_results(load_json(ssl_file))
     leaks = load_json(leaks_file)
 
     leak_map = {}
@@ -24,7 +50,11 @@ def build_features(asset_file, ports_file, ssl_file, leaks_file):
         if leak.get("label") == "sensitive":
             leak_map[domain] = leak_map.get(domain, 0) + 1
 
-    ssl_map = {item["subdomain"]: item for item in ssl_data}
+    # Prefer the HTTPS certificate when several TLS ports were checked
+    ssl_map = {}
+    for item in ssl_data:
+        if item["subdomain"] not in ssl_map or item.get("port", 443) == 443:
+            ssl_map[item["subdomain"]] = item
     ports_map = {item["subdomain"]: item["ports"] for item in ports_data}
 
     features = []
@@ -56,10 +86,23 @@ def build_features(asset_file, ports_file, ssl_file, leaks_file):
     return np.array(features), domains
 
 
-def calculate_risk_scores(asset_file, ports_file, ssl_file, leaks_file, model_path):
-    """Return risk scores for each asset without writing to disk."""
+def calculate_risk_scores(asset_file, ports_file, ssl_file, leaks_file, model_path, server=None):
+    """Return risk scores for each asset without writing to disk.
+
+    The model comes from the shared model registry, so repeated calls reuse
+    it. With ``server`` the scores are computed by a running inference
+    server instead: it reads the same files, so paths are sent absolute,
+    and loads the model of the same file name from its models directory.
+    """
+    if server:
+        from src.ML.inference_server import remote_risk_scores
+
+        files = [asset_file, ports_file, ssl_file, leaks_file]
+        return remote_risk_scores(server, *(os.path.abspath(f) for f in files),
+                                  os.path.basename(model_path))
+
     X, domains = build_features(asset_file, ports_file, ssl_file, leaks_file)
-    model = joblib.load(model_path)
+    model = load_model(model_path)
     scores = model.predict(X)
 
     results = []
@@ -81,12 +124,10 @@ def calculate_risk_scores(asset_file, ports_file, ssl_file, leaks_file, model_pa
 
 def score_domains(args):
     results = calculate_risk_scores(
-        args.assets, args.ports, args.ssl, args.leaks, args.model
+        args.assets, args.ports, args.ssl, args.leaks, args.model, args.server
     )
 
-    os.makedirs(os.path.dirname(args.output), exist_ok=True)
-    with open(args.output, "w") as f:
-        json.dump(results, f, indent=2)
+    helpers.save_json(results, args.output)
 
     print(f"[+] Saved risk scores to {args.output}")
 
@@ -101,6 +142,7 @@ if __name__ == "__main__":
     parser.add_argument(
         "--output", default="data/risk_scores.json", help="Output path for results"
     )
+    parser.add_argument("--server", help="URL of a running inference server to score with")
 
     args = parser.parse_args()
     score_domains(args)
@@ -1,4 +1,3 @@
-import json
 import numpy as np
 from sklearn.ensemble import RandomForestRegressor
 from sklearn.model_selection import train_test_split
@@ -6,12 +5,14 @@ from sklearn.metrics import mean_absolute_error, r2_score
 import joblib
 import os
 
+from src.utils import serializer
+
 DATA_FILE = 'ML/models/sample_risk_training_data.json'
 MODEL_PATH = 'ML/models/risk_model.pkl'
 
 def load_training_data(path):
-    with open(path, 'r') as f:
-        raw_data = json.load(f)
+    with open(path, 'rb') as f:
+        raw_data = serializer.loads(f.read())
 
     X, y = [], []
 
@@ -40,7 +41,11 @@ def train_and_save_model():
     print(f"R² Score: {r2_score(y_test, y_pred):.2f}")
 
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(model, MODEL_PATH)
+    # Write a new file and swap it in so processes still using the old model
+    # (possibly memory-mapped) are never handed a truncated one
+    tmp_path = f"{MODEL_PATH}.{os.getpid()}.tmp"
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, MODEL_PATH)
     print(f"[+] Saved trained model to {MODEL_PATH}")
 
 if __name__ == "__main__":
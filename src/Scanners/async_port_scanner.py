@@ -0,0 +1,184 @@
+# scanners/async_port_scanner.py
+"""Pure-asyncio TCP connect port scanner.
+
+Alternative to the nmap engine in ``port_scanner``: every probe is a plain
+``asyncio.open_connection`` so thousands of sockets can be in flight from a
+single process. A global semaphore caps open sockets, each host gets its own
+concurrency and optional rate limit, and results use the same
+``{"subdomain", "ip", "ports"}`` record format as the nmap engine.
+"""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from src.utils import config, helpers
+from src.utils.logger import get_logger
+from src.utils.scheduler import get_scheduler
+
+logger = get_logger(__name__)
+OUTPUT_DIR = str(config.DATA_DIR)
+
+
+def parse_ports(ports):
+    """Expand an nmap style port spec (``"22,80,8000-8100"``) into a sorted list."""
+    port_list = set()
+    for part in str(ports).split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = (int(p) for p in part.split("-", 1))
+        else:
+            start = end = int(part)
+        if not 1 <= start <= end <= 65535:
+            raise ValueError(f"Invalid port range: {part}")
+        port_list.update(range(start, end + 1))
+    return sorted(port_list)
+
+
+class HostLimiter:
+    """Limit probes against a single host by concurrency and rate."""
+
+    def __init__(self, concurrency, rate=None):
+        self._sem = asyncio.Semaphore(concurrency)
+        self._interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self._sem.acquire()
+        if self._interval:
+            async with self._lock:
+                now = time.monotonic()
+                wait = self._next - now
+                self._next = max(now, self._next) + self._interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        return self
+
+    async def __aexit__(self, *exc):
+        self._sem.release()
+
+
+async def probe_port(ip, port, timeout):
+    """Return True if a TCP connection to ``ip:port`` succeeds within ``timeout``."""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+
+async def scan_host_async(ip, port_list, sem, per_host=config.PROBES_PER_HOST,
+                          rate=None, timeout=config.CONNECT_TIMEOUT, scheduler=None):
+    """Probe ``port_list`` on ``ip`` and return the open ports as port dicts.
+
+    Every probe also takes a token from ``scheduler`` (the shared one by
+    default) so connect scans respect the same limits as the other scanners.
+    """
+    limiter = HostLimiter(per_host, rate)
+    limits = scheduler or get_scheduler()
+    pending = iter(port_list)
+    open_ports = []
+
+    async def prober():
+        for port in pending:
+            async with limiter:
+                await limits.acquire(ip)
+                async with sem:
+                    if await probe_port(ip, port, timeout):
+                        open_ports.append(port)
+
+    await asyncio.gather(*(prober() for _ in range(min(per_host, len(port_list)) or 1)))
+    return [{"port": port, "protocol": "tcp", "state": "open"} for port in sorted(open_ports)]
+
+
+def scan_ports(asset_list, ports="1-1000", workers: int = config.DEFAULT_WORKERS,
+               per_host: int = config.PROBES_PER_HOST, rate=None,
+               timeout: float = config.CONNECT_TIMEOUT, on_result=None):
+    """Scan open TCP ports on a list of assets with asyncio connect probes.
+
+    ``workers`` caps sockets open at once across all hosts, ``per_host`` caps
+    them per IP and ``rate`` optionally limits new probes per second per IP.
+    ``on_result`` is called with one record per IP as soon as it is scanned.
+    """
+    port_list = parse_ports(ports)
+    first_name = {}
+    for asset in asset_list:
+        if asset.get("ip"):
+            first_name.setdefault(asset["ip"], asset["subdomain"])
+    unique_ips = list(first_name)
+
+    async def run_all():
+        sem = asyncio.Semaphore(workers)
+
+        async def scan(ip):
+            logger.info(f"Probing {len(port_list)} ports on {ip}")
+            try:
+                found, error = await scan_host_async(ip, port_list, sem, per_host, rate, timeout), None
+            except Exception as e:
+                logger.error(f"Error scanning {ip}: {e}")
+                found, error = [], str(e)
+            if on_result:
+                record = {"subdomain": first_name[ip], "ip": ip, "ports": found}
+                if error:
+                    record["error"] = error
+                on_result(record)
+            return ip, found, error
+
+        return await asyncio.gather(*(scan(ip) for ip in unique_ips))
+
+    by_ip = {ip: (found, error) for ip, found, error in asyncio.run(run_all())}
+
+    results = []
+    for asset in asset_list:
+        ip = asset.get("ip")
+        if not ip:
+            continue
+        found, error = by_ip[ip]
+        record = {"subdomain": asset["subdomain"], "ip": ip, "ports": list(found)}
+        if error:
+            record["error"] = error
+        results.append(record)
+
+    return results
+
+
+def save_results(domain, data, output_format="json"):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    suffix = helpers.OUTPUT_FORMATS[output_format]
+    output_file = os.path.join(OUTPUT_DIR, f"{domain}_ports_{timestamp}{suffix}")
+    helpers.save_records(data, output_file)
+    logger.info(f"Port scan results saved to {output_file}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Async TCP connect port scanner")
+    parser.add_argument("--domain", required=True, help="Target domain")
+    parser.add_argument("--input", required=True, help="Path to resolved subdomain JSON")
+    parser.add_argument("--ports", default=config.DEFAULT_PORT_RANGE, help="Port range to scan")
+    parser.add_argument("--workers", type=int, default=config.DEFAULT_WORKERS,
+                        help="Sockets open at once across all hosts")
+    parser.add_argument("--per-host", type=int, default=config.PROBES_PER_HOST,
+                        help="Sockets open at once per host")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="Maximum new probes per second per host")
+    parser.add_argument("--timeout", type=float, default=config.CONNECT_TIMEOUT,
+                        help="Connect timeout in seconds")
+    parser.add_argument("--format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Output format")
+    args = parser.parse_args()
+
+    assets = helpers.load_records(args.input, default=[])
+
+    results = scan_ports(assets, ports=args.ports, workers=args.workers,
+                         per_host=args.per_host, rate=args.rate, timeout=args.timeout)
+    save_results(args.domain, results, args.format)
@@ -0,0 +1,90 @@
+# scanners/cert_store.py
+"""Fingerprint-keyed certificate storage.
+
+Wildcard and SAN certificates are served by many subdomains. The cache
+keeps one parsed copy per SHA-256 fingerprint so each unique certificate
+(and its dates) is only parsed once, and the compact result format stores
+each certificate once with subdomains referring to it by fingerprint:
+
+    {"certificates": {fingerprint: {...}}, "subdomains": [{"subdomain": ..., "Fingerprint": ...}]}
+"""
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+
+from src.utils import helpers
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Fields that belong to the certificate itself rather than to the host serving it
+CERT_FIELDS = (
+    "Issuer", "Subject", "Serial Number", "Version", "Not Before", "Not After",
+    "Days to Expiry", "is_expired", "Chain",
+)
+
+
+class CertificateCache:
+    """Parsed certificates keyed by fingerprint, optionally persisted as JSON."""
+
+    def __init__(self, path: str | Path | None = None):
+        self.path = Path(path) if path else None
+        self._entries = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._entries = helpers.load_json(self.path, default={})
+            logger.info(f"Loaded {len(self._entries)} cached certificates from {self.path}")
+
+    def get(self, fingerprint):
+        """Return ``(info, expires_at)`` for a known certificate, else None."""
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+        if entry is None:
+            return None
+        return entry["info"], entry["expires_at"]
+
+    def put(self, fingerprint, info, expires_at):
+        with self._lock:
+            self._entries[fingerprint] = {"info": info, "expires_at": expires_at}
+
+    def save(self):
+        if self.path:
+            with self._lock:
+                entries = dict(self._entries)
+            helpers.save_json(entries, self.path)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def days_until(expires_at, now=None):
+    return int((expires_at - (now or time.time())) // 86400)
+
+
+def compact_results(results):
+    """Store each certificate once and point subdomain records at it."""
+    certificates = {}
+    subdomains = []
+    for record in results:
+        fingerprint = record.get("Fingerprint")
+        if not fingerprint:
+            subdomains.append(record)
+            continue
+        certificates.setdefault(
+            fingerprint, {key: record[key] for key in CERT_FIELDS if key in record}
+        )
+        subdomains.append({key: value for key, value in record.items() if key not in CERT_FIELDS})
+    return {"certificates": certificates, "subdomains": subdomains}
+
+
+def expand_results(data):
+    """Inverse of :func:`compact_results`; plain result lists pass through."""
+    if isinstance(data, list):
+        return data
+    certificates = data.get("certificates", {})
+    return [
+        {**certificates.get(record.get("Fingerprint"), {}), **record}
+        for record in data.get("subdomains", [])
+    ]
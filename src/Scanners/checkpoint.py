@@ -0,0 +1,157 @@
+# scanners/checkpoint.py
+"""Checkpointing and resume for long scans.
+
+While ``run_all`` works, every per-host result is appended to a JSONL
+journal (``data/{domain}_journal.jsonl``) as soon as a scanner produces it:
+
+    {"stage": "ports", "record": {"subdomain": ..., "ip": ..., "ports": [...]}}
+
+Lines are flushed as they are written and fsynced every few seconds, so a
+killed or crashed run loses at most the hosts in flight. A resumed run
+reloads the journal, skips the work it records and merges the journaled
+records into the final output. The journal is removed once the output
+files are saved.
+"""
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.Scanners.planner import ScanPlan, tls_key
+from src.Scanners.ssl_checker import open_tls_ports
+from src.utils import config, serializer
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Journal marker written once every resolved asset has been recorded
+RESOLVED = "resolved"
+
+
+def journal_path(domain, data_dir="data"):
+    return Path(data_dir) / f"{domain}_journal.jsonl"
+
+
+def load_journal(path):
+    """Return ``{stage: [records]}`` from a journal, ignoring a torn last line."""
+    entries = {}
+    path = Path(path)
+    if not path.exists():
+        return entries
+    with open(path, "rb") as f:
+        for number, line in enumerate(f, 1):
+            try:
+                entry = serializer.loads(line)
+            except ValueError:
+                logger.warning(f"Ignoring unreadable journal line {number} in {path}")
+                continue
+            entries.setdefault(entry["stage"], []).append(entry["record"])
+    return entries
+
+
+def rotate_journal(path):
+    """Move an existing journal aside and return its new path, or None if there is none.
+
+    The rotated copy keeps the old journal's modification time in its name
+    so it can still be resumed by moving it back.
+    """
+    path = Path(path)
+    if not path.exists() or path.stat().st_size == 0:
+        return None
+    stamp = datetime.fromtimestamp(path.stat().st_mtime).strftime("%Y%m%d_%H%M%S")
+    rotated = path.with_name(f"{path.name[:-len(path.suffix)]}_{stamp}{path.suffix}")
+    os.replace(path, rotated)
+    logger.warning(f"Moved existing journal {path} to {rotated}; use --resume to continue a scan")
+    return rotated
+
+
+class Journal:
+    """Append-only JSONL journal of completed per-host results. Thread-safe.
+
+    Without ``resume`` an existing journal is rotated rather than truncated,
+    so forgetting ``--resume`` after a crash does not lose the checkpoint.
+    """
+
+    def __init__(self, path, resume: bool = False,
+                 sync_interval: float = config.CHECKPOINT_INTERVAL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.rotated = None if resume else rotate_journal(self.path)
+        self.entries = load_journal(self.path) if resume else {}
+        if self.entries:
+            counts = ", ".join(f"{len(v)} {k}" for k, v in self.entries.items() if k != RESOLVED)
+            logger.info(f"Resuming from {self.path}: {counts}")
+        self.sync_interval = sync_interval
+        self._file = open(self.path, "ab" if resume else "wb")
+        self._lock = threading.Lock()
+        self._synced = time.monotonic()
+
+    def record(self, stage, record):
+        line = serializer.dumps({"stage": stage, "record": record}) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if time.monotonic() - self._synced >= self.sync_interval:
+                os.fsync(self._file.fileno())
+                self._synced = time.monotonic()
+
+    def record_assets(self, assets):
+        """Journal the resolved assets followed by the marker that they are complete."""
+        for asset in assets:
+            self.record("assets", asset)
+        self.record(RESOLVED, {"count": len(assets)})
+
+    def close(self, remove: bool = False):
+        with self._lock:
+            self._file.close()
+        if remove:
+            self.path.unlink(missing_ok=True)
+
+
+class ResumeState:
+    """Work already finished according to a journal's entries.
+
+    Records with an ``error`` are dropped so those hosts are retried, as are
+    tech records without a ``url`` (the page could not be fetched). TLS
+    progress is tracked per (IP, SNI, port): a target counts as done only
+    once its IP's port scan is journaled and port 443 plus every open TLS
+    port it reported has a journaled certificate.
+    """
+
+    def __init__(self, entries):
+        self.assets = entries.get("assets") if entries.get(RESOLVED) else None
+        self.ports = {
+            record["ip"]: record for record in entries.get("ports", [])
+            if record.get("ip") and "error" not in record
+        }
+        self.ssl = [record for record in entries.get("ssl", []) if "error" not in record]
+        self.tls_done = {(*tls_key(record), record.get("port", 443)) for record in self.ssl}
+        self.tech = {
+            record["subdomain"]: record for record in entries.get("tech", []) if record.get("url")
+        }
+
+    def done(self, stage, asset):
+        if stage == "ports":
+            return asset.get("ip") in self.ports
+        if stage == "ssl":
+            ip = asset.get("ip")
+            if ip and ip not in self.ports:
+                # The port scan reruns and may report more TLS ports
+                return False
+            ports = [443] + (open_tls_ports([self.ports[ip]]).get(ip, []) if ip else [])
+            return all((*tls_key(asset), port) in self.tls_done for port in ports)
+        return asset["subdomain"] in self.tech
+
+    def carried(self, stage, assets):
+        """Journaled records for ``stage`` fanned out to ``assets``, keyed by subdomain."""
+        if stage == "ports":
+            records = ScanPlan(assets).expand_ports(self.ports.values())
+        elif stage == "ssl":
+            records = ScanPlan(assets).expand_tls(self.ssl)
+        else:
+            records = [self.tech[a["subdomain"]] for a in assets if a["subdomain"] in self.tech]
+        carried = {}
+        for record in records:
+            carried.setdefault(record["subdomain"], []).append(record)
+        return carried
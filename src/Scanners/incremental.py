@@ -0,0 +1,173 @@
+# scanners/incremental.py
+"""Incremental rescans.
+
+Loads the newest assets/ports/ssl/tech files written by a previous
+``run_all`` for the same domain, decides which hosts still have fresh
+results (younger than the freshness window) and can be skipped, and diffs
+the new run against the previous one.
+
+Results carried forward keep a ``scanned_at`` timestamp so their age is
+tracked across several incremental runs; freshly scanned records take the
+timestamp in their output file name.
+"""
+import re
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from src.Scanners.cert_store import expand_results
+from src.utils import helpers
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STAGE_PREFIXES = {
+    "assets": "assets",
+    "ports": "ports",
+    "ssl": "ssl_results",
+    "tech": "tech_stack",
+}
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+_TIMESTAMP_RE = re.compile(r"_(\d{8}_\d{6})(\.json|\.jsonl|\.jsonl\.gz)$")
+
+
+def latest_output(domain, prefix, data_dir="data"):
+    """Return ``(path, timestamp)`` of the newest ``{domain}_{prefix}_*`` output file.
+
+    JSON and JSON Lines (plain or gzipped) outputs are all considered.
+    """
+    candidates = []
+    for path in Path(data_dir).glob(f"{domain}_{prefix}_*.json*"):
+        match = _TIMESTAMP_RE.search(path.name)
+        if match and path.name == f"{domain}_{prefix}_{match.group(1)}{match.group(2)}":
+            candidates.append((datetime.strptime(match.group(1), TIMESTAMP_FORMAT), path))
+    if not candidates:
+        return None
+    timestamp, path = max(candidates)
+    return path, timestamp
+
+
+class PreviousRun:
+    """Results of the last run for a domain, indexed by stage and subdomain."""
+
+    def __init__(self, domain, freshness_hours: float = 24, data_dir="data", now=None):
+        self.domain = domain
+        self.cutoff = (now or datetime.now()) - timedelta(hours=freshness_hours)
+        self.records = {}
+        for stage, prefix in STAGE_PREFIXES.items():
+            found = latest_output(domain, prefix, data_dir)
+            by_subdomain = {}
+            if found:
+                path, file_time = found
+                logger.info(f"Loaded previous {stage} results from {path}")
+                for record in expand_results(helpers.load_records(path, default=[])):
+                    record.setdefault("scanned_at", file_time.strftime(TIMESTAMP_FORMAT))
+                    by_subdomain.setdefault(record.get("subdomain"), []).append(record)
+            self.records[stage] = by_subdomain
+
+    def subdomains(self):
+        return set(self.records["assets"])
+
+    def fresh(self, stage, asset):
+        """Return the previous records for ``asset`` if they can be reused, else None."""
+        records = self.records[stage].get(asset["subdomain"])
+        if not records:
+            return None
+        for record in records:
+            if "error" in record:
+                return None
+            if datetime.strptime(record["scanned_at"], TIMESTAMP_FORMAT) < self.cutoff:
+                return None
+            if stage == "ports" and record.get("ip") != asset.get("ip"):
+                return None
+        return records
+
+    def port_records(self):
+        """Fresh port records, one per IP, for IPs whose port scan is skipped."""
+        by_ip = {
+            record["ip"]: record
+            for records in self.records["ports"].values()
+            for record in records
+            if record.get("ip") and self.fresh("ports", record)
+        }
+        return list(by_ip.values())
+
+    def split(self, stage, assets):
+        """Split ``assets`` into those to rescan and the records carried forward."""
+        stale, carried = [], {}
+        for asset in assets:
+            records = self.fresh(stage, asset)
+            if records is None:
+                stale.append(asset)
+            else:
+                carried[asset["subdomain"]] = records
+        logger.info(f"Incremental {stage}: rescanning {len(stale)}, reusing {len(carried)}")
+        return stale, carried
+
+
+def merge(assets, carried, results):
+    """Combine carried-forward and new records in asset order."""
+    fresh = {}
+    for record in results:
+        fresh.setdefault(record.get("subdomain"), []).append(record)
+    merged = []
+    for name in dict.fromkeys(asset["subdomain"] for asset in assets):
+        merged.extend(fresh.get(name) or carried.get(name, []))
+    return merged
+
+
+def _open_ports(records):
+    return {
+        (port["port"], port["protocol"])
+        for record in records
+        for port in record.get("ports", [])
+        if port.get("state") == "open"
+    }
+
+
+def _cert_summary(record):
+    if "error" in record:
+        return {"error": record["error"]}
+    return {key: record.get(key) for key in ("Serial Number", "Issuer", "Not After")}
+
+
+def diff_runs(previous, assets, port_results, ssl_results):
+    """Compact diff of this run against ``previous``.
+
+    Reports new and removed subdomains, ports opened or closed on hosts
+    seen before, and certificates whose serial, issuer or expiry changed.
+    """
+    before = previous.subdomains()
+    after = {asset["subdomain"] for asset in assets}
+
+    current_ports = {}
+    for record in port_results:
+        current_ports.setdefault(record["subdomain"], []).append(record)
+    opened, closed = [], []
+    for name, records in current_ports.items():
+        if name not in previous.records["ports"]:
+            continue
+        old, new = _open_ports(previous.records["ports"][name]), _open_ports(records)
+        opened += [{"subdomain": name, "port": p, "protocol": proto} for p, proto in sorted(new - old)]
+        closed += [{"subdomain": name, "port": p, "protocol": proto} for p, proto in sorted(old - new)]
+
+    previous_certs = {
+        (record["subdomain"], record.get("port", 443)): record
+        for records in previous.records["ssl"].values()
+        for record in records
+    }
+    cert_changes = []
+    for record in ssl_results:
+        key = (record["subdomain"], record.get("port", 443))
+        if key not in previous_certs:
+            continue
+        old, new = _cert_summary(previous_certs[key]), _cert_summary(record)
+        if old != new:
+            cert_changes.append({"subdomain": key[0], "port": key[1], "before": old, "after": new})
+
+    return {
+        "new_subdomains": sorted(after - before),
+        "removed_subdomains": sorted(before - after),
+        "opened_ports": opened,
+        "closed_ports": closed,
+        "cert_changes": cert_changes,
+    }
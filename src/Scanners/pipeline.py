@@ -0,0 +1,235 @@
+# scanners/pipeline.py
+"""Streaming scan pipeline.
+
+Resolved assets are pushed through bounded asyncio queues into the port,
+SSL and tech stages as soon as each DNS lookup completes, so the stages
+overlap with discovery instead of waiting for the full asset list. Full
+queues block the resolver, which keeps memory flat on large estates.
+
+The final per-stage result lists have the same shape and order as the
+batch path in ``run_scanners.run_all``.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from src.Scanners import async_port_scanner, port_scanner
+from src.Scanners.planner import ScanPlan, tls_key
+from src.Scanners.ssl_checker import check_asset_async, open_tls_ports
+from src.Scanners.subdomain_scanner import resolve_stream
+from src.Scanners.tech_scanner import (
+    FetchPlanner, create_analysis_pool, create_session, get_wappalyzer, scan_domain_async
+)
+from src.utils import config
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_DONE = object()
+
+
+async def _drain(queue, size):
+    """Wait for the next item and take up to ``size`` more without blocking."""
+    items = [await queue.get()]
+    while len(items) < size and items[-1] is not _DONE:
+        try:
+            items.append(queue.get_nowait())
+        except asyncio.QueueEmpty:
+            break
+    return items
+
+
+async def _supervised(coro, tasks):
+    """Run ``coro`` while watching the consumer ``tasks``.
+
+    If a consumer fails first, everything is cancelled and its error raised,
+    so a producer blocked on a full queue nobody reads cannot hang the scan.
+    Consumers that finish normally are simply no longer watched.
+    """
+    main = asyncio.ensure_future(coro)
+    watched = set(tasks)
+    try:
+        while not main.done():
+            done, _ = await asyncio.wait({main, *watched}, return_when=asyncio.FIRST_COMPLETED)
+            for task in done - {main}:
+                watched.discard(task)
+                if not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        return main.result()
+    except BaseException:
+        main.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(main, *tasks, return_exceptions=True)
+        raise
+
+
+async def run_pipeline(subdomains, ports: str = "1-100", workers: int = 100,
+                       engine: str = "nmap", queue_size: int = config.PIPELINE_QUEUE_SIZE,
+                       on_result=None, skip=None,
+                       analysis_workers: int = config.ANALYSIS_WORKERS, analysis_pool=None,
+                       known_ports=None, timeout: int = config.FETCH_TIMEOUT):
+    """Resolve ``subdomains`` and stream them through the port, SSL and tech stages.
+
+    ``on_result(stage, record)`` is called as each per-IP port result,
+    per-(IP, SNI, port) certificate and per-name tech result becomes
+    available. Port 443 is checked for TLS as soon as an asset resolves;
+    other open TLS ports are probed once the port stage reports them.
+    Assets for which ``skip(stage, asset)`` is true are not sent to that
+    stage; for an IP whose port scan is skipped the other open TLS ports
+    come from its record in ``known_ports`` instead. An existing
+    ``analysis_pool`` is used as-is instead of starting one. ``timeout`` is
+    the tech stage's per-request HTTP timeout, as in ``detect_technologies``.
+    Returns a dict of ``assets``, ``ports``, ``ssl`` and ``tech`` lists.
+    """
+    loop = asyncio.get_running_loop()
+    port_q = asyncio.Queue(queue_size)
+    ssl_q = asyncio.Queue(queue_size)
+    tech_q = asyncio.Queue(queue_size)
+
+    assets = []
+    port_by_ip = {}
+    ssl_checked = []
+    tls_targets_by_ip = {}
+    tls_ports_by_ip = {}
+    known_tls_ports = open_tls_ports(known_ports)
+    queued_tls = set()
+    tech_by_name = {}
+    fetch_planner = FetchPlanner()
+
+    def emit(stage, record):
+        if on_result:
+            on_result(stage, record)
+
+    async def check_tls(asset, ports):
+        # An IP can be port scanned after its carried-over ports were queued
+        for port in ports:
+            if (tls_key(asset), port) not in queued_tls:
+                queued_tls.add((tls_key(asset), port))
+                await ssl_q.put((asset, port))
+
+    async def produce():
+        seen_ips, seen_tls, seen_names = set(), set(), set()
+
+        def wanted(stage, asset):
+            return skip is None or not skip(stage, asset)
+
+        async for asset in resolve_stream(subdomains):
+            assets.append(asset)
+            ip, name = asset["ip"], asset["subdomain"]
+            emit("assets", asset)
+            if ip:
+                fetch_planner.addresses[name] = ip
+            if ip and ip not in seen_ips and wanted("ports", asset):
+                seen_ips.add(ip)
+                await port_q.put(asset)
+            if tls_key(asset) not in seen_tls and wanted("ssl", asset):
+                seen_tls.add(tls_key(asset))
+                tls_targets_by_ip.setdefault(ip, []).append(asset)
+                if ip in seen_ips:
+                    extra = tls_ports_by_ip.get(ip, [])
+                else:
+                    extra = known_tls_ports.get(ip, [])
+                await check_tls(asset, [443] + extra)
+            if name not in seen_names and wanted("tech", asset):
+                seen_names.add(name)
+                await tech_q.put(asset)
+
+    async def store_ports(record):
+        ip = record["ip"]
+        port_by_ip[ip] = record
+        emit("ports", record)
+        tls_ports_by_ip[ip] = open_tls_ports([record]).get(ip, [])
+        for asset in tls_targets_by_ip.get(ip, []):
+            await check_tls(asset, tls_ports_by_ip[ip])
+
+    async def nmap_stage(executor):
+        while True:
+            items = await _drain(port_q, config.NMAP_BATCH_SIZE)
+            batch = [item for item in items if item is not _DONE]
+            if batch:
+                ips = [item["ip"] for item in batch]
+                try:
+                    found = await loop.run_in_executor(executor, port_scanner.scan_batch, ips, ports)
+                    errors = {}
+                except Exception as e:
+                    logger.error(f"Error scanning batch {', '.join(ips)}: {e}")
+                    found, errors = {}, {ip: str(e) for ip in ips}
+                for item in batch:
+                    record = {"subdomain": item["subdomain"], "ip": item["ip"],
+                              "ports": found.get(item["ip"], [])}
+                    if item["ip"] not in found:
+                        record["error"] = errors.get(item["ip"], "Host did not respond to nmap")
+                    await store_ports(record)
+            if len(batch) < len(items):
+                return
+
+    async def connect_stage(sem, port_list):
+        while (item := await port_q.get()) is not _DONE:
+            record = {"subdomain": item["subdomain"], "ip": item["ip"]}
+            try:
+                record["ports"] = await async_port_scanner.scan_host_async(item["ip"], port_list, sem)
+            except Exception as e:
+                logger.error(f"Error scanning {item['ip']}: {e}")
+                record.update(ports=[], error=str(e))
+            await store_ports(record)
+
+    async def ssl_stage():
+        while (work := await ssl_q.get()) is not _DONE:
+            item, port = work
+            record = await check_asset_async(item, port=port)
+            ssl_checked.append(record)
+            emit("ssl", record)
+
+    async def tech_stage(session, wappalyzer, analysis_pool):
+        while (item := await tech_q.get()) is not _DONE:
+            record = await scan_domain_async(
+                session, item["subdomain"], wappalyzer, timeout, analysis_pool,
+                planner=fetch_planner,
+            )
+            tech_by_name[item["subdomain"]] = record
+            emit("tech", record)
+
+    wappalyzer = await loop.run_in_executor(None, get_wappalyzer)
+    owned_pool = create_analysis_pool(analysis_workers) if analysis_pool is None else None
+    analysis_pool = analysis_pool or owned_pool
+    with ThreadPoolExecutor(max_workers=workers) as executor, (owned_pool or nullcontext()):
+        async with create_session(workers, fetch_planner) as session:
+            if engine == "async":
+                sem = asyncio.Semaphore(workers)
+                port_list = async_port_scanner.parse_ports(ports)
+                port_workers = [connect_stage(sem, port_list) for _ in range(workers)]
+            else:
+                port_workers = [nmap_stage(executor) for _ in range(workers)]
+            stages = {
+                port_q: port_workers,
+                ssl_q: [ssl_stage() for _ in range(workers)],
+                tech_q: [tech_stage(session, wappalyzer, analysis_pool) for _ in range(workers)],
+            }
+            consumers = {
+                queue: [asyncio.ensure_future(c) for c in group] for queue, group in stages.items()
+            }
+            tasks = [c for group in consumers.values() for c in group]
+
+            async def close_stages():
+                # The port stage feeds extra TLS ports to the SSL stage, so the
+                # SSL queue is only closed once every port worker has finished
+                for queue in (port_q, tech_q, ssl_q):
+                    for _ in consumers[queue]:
+                        await queue.put(_DONE)
+                    if queue is port_q:
+                        await asyncio.gather(*consumers[port_q])
+
+            await _supervised(produce(), tasks)
+            await _supervised(close_stages(), tasks)
+            await asyncio.gather(*tasks)
+
+    order = {name: i for i, name in enumerate(subdomains)}
+    assets.sort(key=lambda asset: order[asset["subdomain"]])
+    plan = ScanPlan(assets)
+    return {
+        "assets": assets,
+        "ports": plan.expand_ports(list(port_by_ip.values())),
+        "ssl": plan.expand_tls(sorted(ssl_checked, key=lambda r: (r["port"] != 443, r["port"]))),
+        "tech": [tech_by_name[name] for name in plan.tech_targets() if name in tech_by_name],
+    }
@@ -0,0 +1,88 @@
+# scanners/planner.py
+"""Plan scanner work so shared IPs are only scanned once.
+
+Many subdomains resolve to the same CDN or load-balancer address. The plan
+groups resolved assets by IP (and by IP + SNI name for TLS), hands one
+representative per group to the scanners and fans the results back out to
+every subdomain in the group.
+"""
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def sni_key(subdomain):
+    return subdomain.strip().rstrip(".").lower()
+
+
+def tls_key(asset):
+    return asset.get("ip"), sni_key(asset["subdomain"])
+
+
+class ScanPlan:
+    """IP-keyed work plan built from resolved asset records.
+
+    The ``*_targets`` methods accept an optional ``skip(asset)`` predicate;
+    a group is only left out when every asset in it is skipped.
+    """
+
+    def __init__(self, assets):
+        self.assets = list(assets)
+        self.by_ip = {}
+        self.by_tls = {}
+        self.by_name = {}
+        for asset in self.assets:
+            ip = asset.get("ip")
+            if ip:
+                self.by_ip.setdefault(ip, []).append(asset)
+            self.by_tls.setdefault(tls_key(asset), []).append(asset)
+            self.by_name.setdefault(asset["subdomain"], []).append(asset)
+
+        logger.info(
+            f"Planned {len(self.by_ip)} unique IPs and {len(self.by_tls)} TLS targets "
+            f"for {len(self.assets)} assets"
+        )
+
+    @staticmethod
+    def _representatives(groups, skip):
+        return [
+            group[0] for group in groups.values()
+            if skip is None or not all(skip(asset) for asset in group)
+        ]
+
+    def port_targets(self, skip=None):
+        """One asset per unique IP."""
+        return self._representatives(self.by_ip, skip)
+
+    def tls_targets(self, skip=None):
+        """One asset per unique (IP, SNI) pair."""
+        return self._representatives(self.by_tls, skip)
+
+    def tech_targets(self, skip=None):
+        """Unique subdomain names in discovery order."""
+        return [asset["subdomain"] for asset in self._representatives(self.by_name, skip)]
+
+    def expand_ports(self, results):
+        """Copy each per-IP port result onto every subdomain sharing the IP."""
+        by_ip = {item["ip"]: item for item in results if item.get("ip")}
+        expanded = []
+        for asset in self.assets:
+            item = by_ip.get(asset.get("ip"))
+            if item is not None:
+                expanded.append({**item, "subdomain": asset["subdomain"]})
+        return expanded
+
+    def expand_tls(self, results):
+        """Copy per-(IP, SNI) TLS results onto every subdomain with that pair.
+
+        Each result carries the ``ip`` and ``subdomain`` it was fetched for;
+        several results per pair (one per TLS port) are all copied.
+        """
+        by_key = {}
+        for result in results:
+            by_key.setdefault(tls_key(result), []).append(result)
+        return [
+            {**result, "subdomain": asset["subdomain"]}
+            for asset in self.assets
+            for result in by_key.get(tls_key(asset), [])
+        ]
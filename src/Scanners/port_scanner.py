@@ -1,59 +1,107 @@
 # scanners/port_scanner.py
 import nmap
 import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 from src.utils import config, helpers
 from src.utils.logger import get_logger
+from src.utils.scheduler import get_scheduler
 
 logger = get_logger(__name__)
 OUTPUT_DIR = str(config.DATA_DIR)
 
-def scan_ports(asset_list, ports="1-1000"):
-    """Scans open ports on a list of assets with Nmap."""
+def scan_batch(ips, ports):
+    """Run a single nmap invocation against a batch of IPs.
+
+    Returns a mapping of IP -> list of port dicts. Hosts nmap did not
+    report on are left out so the caller can flag them. Each host takes a
+    token from the shared rate scheduler before nmap starts.
+    """
+    limits = get_scheduler()
+    for ip in ips:
+        limits.acquire_sync(ip)
     scanner = nmap.PortScanner()
-    results = []
+    scanner.scan(" ".join(ips), ports)
+    found = {}
+
+    for ip in scanner.all_hosts():
+        ports_found = []
+        for proto in scanner[ip].all_protocols():
+            lport = scanner[ip][proto].keys()
+            for port in sorted(lport):
+                state = scanner[ip][proto][port]["state"]
+                ports_found.append({
+                    "port": port,
+                    "protocol": proto,
+                    "state": state
+                })
+        found[ip] = ports_found
+
+    return found
+
 
+def scan_ports(asset_list, ports="1-1000", workers: int = config.DEFAULT_WORKERS,
+               batch_size: int = config.NMAP_BATCH_SIZE, on_result=None):
+    """Scans open ports on a list of assets with Nmap.
+
+    Unique IPs are grouped into target lists of ``batch_size`` hosts and up
+    to ``workers`` nmap processes run at once. Results are fanned back out
+    to every subdomain record pointing at the scanned IP. ``on_result`` is
+    called with one record per IP as each batch finishes.
+    """
+    first_name = {}
+    for asset in asset_list:
+        if asset.get("ip"):
+            first_name.setdefault(asset["ip"], asset["subdomain"])
+    unique_ips = list(first_name)
+    batches = [unique_ips[i:i + batch_size] for i in range(0, len(unique_ips), batch_size)]
+
+    by_ip = {}
+    errors = {}
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+            futures = {executor.submit(scan_batch, batch, ports): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    found = future.result()
+                except Exception as e:
+                    logger.error(f"Error scanning batch {', '.join(batch)}: {e}")
+                    errors.update({ip: str(e) for ip in batch})
+                    continue
+                logger.info(f"Scanned ports on {len(batch)} hosts")
+                by_ip.update(found)
+                for ip in batch:
+                    if ip not in found:
+                        errors[ip] = "Host did not respond to nmap"
+                    if on_result:
+                        record = {"subdomain": first_name[ip], "ip": ip, "ports": by_ip.get(ip, [])}
+                        if ip in errors:
+                            record["error"] = errors[ip]
+                        on_result(record)
+
+    results = []
     for asset in asset_list:
         ip = asset.get("ip")
         if not ip:
             continue
-        try:
-            logger.info(f"Scanning ports on {ip} ({asset['subdomain']})")
-            scanner.scan(ip, ports)
-            ports_found = []
-
-            for proto in scanner[ip].all_protocols():
-                lport = scanner[ip][proto].keys()
-                for port in sorted(lport):
-                    state = scanner[ip][proto][port]["state"]
-                    ports_found.append({
-                        "port": port,
-                        "protocol": proto,
-                        "state": state
-                    })
-
-            results.append({
-                "subdomain": asset["subdomain"],
-                "ip": ip,
-                "ports": ports_found
-            })
-
-        except Exception as e:
-            logger.error(f"Error scanning {ip}: {e}")
-            results.append({
-                "subdomain": asset["subdomain"],
-                "ip": ip,
-                "ports": [],
-                "error": str(e)
-            })
+        record = {
+            "subdomain": asset["subdomain"],
+            "ip": ip,
+            "ports": list(by_ip.get(ip, []))
+        }
+        if ip in errors:
+            record["error"] = errors[ip]
+        results.append(record)
 
     return results
 
-def save_results(domain, data):
+def save_results(domain, data, output_format="json"):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(OUTPUT_DIR, f"{domain}_ports_{timestamp}.json")
-    helpers.save_json(data, output_file)
+    suffix = helpers.OUTPUT_FORMATS[output_format]
+    output_file = os.path.join(OUTPUT_DIR, f"{domain}_ports_{timestamp}{suffix}")
+    helpers.save_records(data, output_file)
     logger.info(f"Port scan results saved to {output_file}")
 
 if __name__ == "__main__":
@@ -62,9 +110,17 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Port Scanner")
     parser.add_argument("--domain", required=True, help="Target domain")
     parser.add_argument("--input", required=True, help="Path to resolved subdomain JSON")
+    parser.add_argument("--ports", default=config.DEFAULT_PORT_RANGE, help="Port range to scan")
+    parser.add_argument("--workers", type=int, default=config.DEFAULT_WORKERS,
+                        help="Concurrent nmap processes")
+    parser.add_argument("--batch-size", type=int, default=config.NMAP_BATCH_SIZE,
+                        help="Hosts per nmap invocation")
+    parser.add_argument("--format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Output format")
     args = parser.parse_args()
 
-    assets = helpers.load_json(args.input, default=[])
+    assets = helpers.load_records(args.input, default=[])
 
-    results = scan_ports(assets)
-    save_results(args.domain, results)
+    results = scan_ports(assets, ports=args.ports, workers=args.workers,
+                         batch_size=args.batch_size)
+    save_results(args.domain, results, args.format)
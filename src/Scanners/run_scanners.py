@@ -1,49 +1,322 @@
-import json
+import asyncio
 import os
+import socket
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from queue import SimpleQueue
 
+from src.Scanners.cert_store import compact_results
+from src.Scanners.checkpoint import Journal, ResumeState, journal_path
+from src.Scanners.incremental import PreviousRun, diff_runs, merge
+from src.Scanners.pipeline import run_pipeline
+from src.Scanners.planner import ScanPlan
 from src.Scanners.subdomain_scanner import run_sublist3r, resolve_subdomains
 from src.Scanners.port_scanner import scan_ports
+from src.Scanners.async_port_scanner import scan_ports as scan_ports_async
 from src.Scanners.ssl_checker import scan_subdomains as scan_ssl
-from src.Scanners.tech_scanner import detect_technologies
+from src.Scanners.tech_scanner import create_analysis_pool, detect_technologies
+from src.utils import config, helpers, scheduler
+from src.utils.work_queue import WorkQueue
+
+
+OUTPUT_DIR = "data"
 
 
 def save_json(domain, prefix, data):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"data/{domain}_{prefix}_{timestamp}.json"
-    os.makedirs("data", exist_ok=True)
-    with open(filename, "w") as f:
-        json.dump(data, f, indent=2)
+    filename = f"{OUTPUT_DIR}/{domain}_{prefix}_{timestamp}.json"
+    helpers.save_json(data, filename)
     print(f"[✓] Saved {prefix} results to {filename}")
     return filename
 
 
-def run_all(domain, ports: str = "1-100", workers: int = 100):
-    print(f"[•] Running all scanners for: {domain}")
+def save_records(domain, prefix, records, output_format="jsonl"):
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{OUTPUT_DIR}/{domain}_{prefix}_{timestamp}{helpers.OUTPUT_FORMATS[output_format]}"
+    helpers.save_records(records, filename)
+    print(f"[✓] Saved {prefix} results to {filename}")
+    return filename
+
+
+PORT_ENGINES = ("nmap", "async")
+
+
+def _run_batch_stages(resolved, ports, workers, engine, skip=None, analysis_pool=None,
+                      on_result=None, known_ports=None):
+    # Scan each unique IP / IP+SNI pair once and share the results
+    plan = ScanPlan(resolved)
+
+    def targets(stage, select):
+        return select(skip=(lambda asset: skip(stage, asset)) if skip else None)
+
+    def report(stage):
+        return (lambda record: on_result(stage, record)) if on_result else None
+
+    port_targets = targets("ports", plan.port_targets)
+    tls_targets = targets("ssl", plan.tls_targets)
+
+    # IPs whose port scan is skipped still have their other open TLS ports
+    # probed, taken from the port records carried over for them
+    scanned_ips = {asset.get("ip") for asset in port_targets}
+    known_ports = [record for record in known_ports or [] if record.get("ip") not in scanned_ips]
+
+    # Per-IP port records are passed on to the SSL stage as they arrive, so
+    # 443 is checked right away and other open TLS ports as they are found
+    port_feed = SimpleQueue()
 
-    # --- Subdomain scan
-    subdomains = run_sublist3r(domain)
-    resolved = resolve_subdomains(subdomains)
-    assets_file = save_json(domain, "assets", resolved)
+    def on_port(record):
+        port_feed.put(record)
+        if on_result:
+            on_result("ports", record)
 
     # Run other scanners concurrently
     with ThreadPoolExecutor(max_workers=3) as executor:
-        future_ports = executor.submit(scan_ports, resolved, ports=ports)
-        future_ssl = executor.submit(scan_ssl, resolved)
+        port_scanner = scan_ports_async if engine == "async" else scan_ports
+        future_ports = executor.submit(
+            port_scanner, port_targets, ports=ports, workers=workers, on_result=on_port,
+        )
+        future_ports.add_done_callback(lambda _: port_feed.put(None))
+        future_ssl = executor.submit(
+            scan_ssl, tls_targets, port_results=known_ports, port_feed=iter(port_feed.get, None),
+            on_result=report("ssl"),
+        )
         future_tech = executor.submit(
             detect_technologies,
-            [item["subdomain"] for item in resolved],
+            targets("tech", plan.tech_targets),
             workers=workers,
+            addresses={asset["subdomain"]: asset["ip"] for asset in resolved if asset.get("ip")},
+            analysis_pool=analysis_pool,
+            on_result=report("tech"),
         )
 
-        port_results = future_ports.result()
-        ssl_results = future_ssl.result()
-        tech_results = future_tech.result()
+        return {
+            "ports": plan.expand_ports(future_ports.result()),
+            "ssl": plan.expand_tls(future_ssl.result()),
+            "tech": future_tech.result(),
+        }
+
+
+def split_units(resolved, unit_size: int = config.WORK_UNIT_SIZE):
+    """Split assets into work units of up to ``unit_size`` IPs.
+
+    Every subdomain behind an IP lands in the same unit so workers keep the
+    per-IP deduplication; unresolved assets are grouped at the end.
+    """
+    plan = ScanPlan(resolved)
+    groups = list(plan.by_ip.values())
+    unresolved = [asset for asset in plan.assets if not asset.get("ip")]
+    units = [
+        [asset for group in groups[i:i + unit_size] for asset in group]
+        for i in range(0, len(groups), unit_size)
+    ]
+    units += [unresolved[i:i + unit_size] for i in range(0, len(unresolved), unit_size)]
+    return units
+
+
+def run_unit(payload, analysis_pool=None):
+    """Scan one work unit taken from the queue and return its per-stage results."""
+    fresh = {stage: set(names) for stage, names in payload.get("skip", {}).items()}
+    skip = (lambda stage, asset: asset["subdomain"] in fresh.get(stage, ())) if fresh else None
+    return _run_batch_stages(payload["assets"], payload["ports"], payload["workers"],
+                             payload["engine"], skip, analysis_pool,
+                             known_ports=payload.get("known_ports"))
+
+
+def _run_distributed_stages(queue, job, resolved, ports, workers, engine, skip=None,
+                            known_ports=None, unit_size: int = config.WORK_UNIT_SIZE,
+                            poll: float = config.WORK_POLL_SECONDS):
+    # Hand the assets to workers through the queue and wait for every unit
+    def unit_skip(unit):
+        # Only the unit's own names, so payloads stay proportional to the unit
+        if not skip:
+            return {}
+        fresh = {
+            stage: [asset["subdomain"] for asset in unit if skip(stage, asset)]
+            for stage in ("ports", "ssl", "tech")
+        }
+        return {stage: names for stage, names in fresh.items() if names}
+
+    def unit_ports(unit):
+        ips = {asset.get("ip") for asset in unit}
+        return [record for record in known_ports or [] if record.get("ip") in ips]
+
+    units = split_units(resolved, unit_size)
+    queue.put(job, [
+        {"assets": unit, "ports": ports, "workers": workers, "engine": engine,
+         "skip": unit_skip(unit), "known_ports": unit_ports(unit)}
+        for unit in units
+    ])
+    print(f"[•] Queued {len(units)} work units for job {job} in {queue.path}")
+
+    while True:
+        queue.expire()
+        counts = queue.counts(job)
+        if not counts.get("pending") and not counts.get("leased"):
+            break
+        time.sleep(poll)
+
+    failures = queue.errors(job)
+    for payload, error in failures:
+        print(f"[!] Work unit with {len(payload['assets'])} assets failed: {error}")
+
+    unit_results = queue.results(job)
+    return {
+        stage: merge(resolved, {}, [record for result in unit_results for record in result[stage]])
+        for stage in ("ports", "ssl", "tech")
+    }
+
+
+def run_worker(queue, worker_id=None, poll: float = config.WORK_POLL_SECONDS,
+               exit_when_idle: bool = False,
+               analysis_workers: int = config.ANALYSIS_WORKERS):
+    """Pull work units from ``queue`` and scan them until stopped.
+
+    The lease on the current unit is renewed in the background while it is
+    scanned, so only a worker that died loses its unit to another worker. A
+    unit that raises is released for a retry. A killed worker can simply be
+    started again. Returns the number of units completed.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    print(f"[•] Worker {worker_id} polling {queue.path}")
+    completed = 0
+    analysis_pool = create_analysis_pool(analysis_workers)
+    with analysis_pool or nullcontext():
+        while True:
+            unit = queue.lease(worker_id)
+            if unit is None:
+                if exit_when_idle:
+                    return completed
+                time.sleep(poll)
+                continue
+
+            stop = threading.Event()
+
+            def heartbeat():
+                while not stop.wait(queue.lease_seconds / 3):
+                    queue.renew(unit["id"], worker_id)
+
+            renewer = threading.Thread(target=heartbeat, daemon=True)
+            renewer.start()
+            try:
+                result = run_unit(unit["payload"], analysis_pool)
+            except Exception as e:
+                print(f"[!] Unit {unit['id']} failed on attempt {unit['attempt']}: {e}")
+                queue.fail(unit["id"], worker_id, str(e))
+                continue
+            finally:
+                stop.set()
+                renewer.join()
+
+            if queue.complete(unit["id"], worker_id, result):
+                completed += 1
+                print(f"[✓] Unit {unit['id']} of job {unit['job']} done")
+
+
+def run_all(domain, ports: str = "1-100", workers: int = 100, engine: str = "nmap",
+            stream: bool = False, incremental: bool = False, freshness_hours: float = 24,
+            analysis_pool=None, queue=None, resume: bool = False,
+            output_format: str = "json"):
+    """Run every scanner for ``domain`` and save one JSON file per stage.
+
+    With ``stream`` the resolver feeds the port, SSL and tech stages through
+    the streaming pipeline so they start on the first resolved asset.
+    With ``incremental`` hosts whose previous results are younger than
+    ``freshness_hours`` are not rescanned, and a diff against the previous
+    run is saved alongside the usual files. ``analysis_pool`` lets batch
+    runs share one Wappalyzer process pool between domains. With a
+    :class:`~src.utils.work_queue.WorkQueue` as ``queue`` this process only
+    coordinates: resolved assets are queued as work units for
+    :func:`run_worker` processes and their results merged back.
+
+    Per-host results are journaled as they complete; with ``resume`` a run
+    that was interrupted picks up from its journal instead of starting over.
+
+    ``output_format`` is ``json`` (one indented document per stage, with
+    compact SSL output) or ``jsonl`` / ``jsonl.gz`` (one record per line,
+    written as it is serialised).
+    """
+    if engine not in PORT_ENGINES:
+        raise ValueError(f"Unknown port scan engine: {engine}")
+    if stream and queue is not None:
+        raise ValueError("Streaming mode cannot hand work to distributed workers")
+    if output_format not in helpers.OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {output_format}")
+    save = save_json if output_format == "json" else partial(save_records, output_format=output_format)
+    print(f"[•] Running all scanners for: {domain}")
+
+    previous = PreviousRun(domain, freshness_hours, OUTPUT_DIR) if incremental else None
+    fresh = (lambda stage, asset: previous.fresh(stage, asset) is not None) if previous else None
 
-    ports_file = save_json(domain, "ports", port_results)
-    ssl_file = save_json(domain, "ssl_results", ssl_results)
-    tech_file = save_json(domain, "tech_stack", tech_results)
+    journal = Journal(journal_path(domain, OUTPUT_DIR), resume=resume)
+    if journal.rotated:
+        print(f"[!] Found the journal of an interrupted scan; moved it to {journal.rotated}. "
+              f"Move it back to {journal.path} and rerun with --resume to continue it")
+    resumed = ResumeState(journal.entries) if resume else None
+    checks = [check for check in (fresh, resumed and resumed.done) if check]
+    skip = (lambda stage, asset: any(check(stage, asset) for check in checks)) if checks else None
+    # Port records of IPs left out of the port scan, newest source last
+    known_ports = {}
+    if previous:
+        known_ports.update((record["ip"], record) for record in previous.port_records())
+    if resumed:
+        known_ports.update(resumed.ports)
+    known_ports = list(known_ports.values())
+
+    try:
+        if stream:
+            # --- Subdomain scan
+            subdomains = run_sublist3r(domain)
+            results = asyncio.run(
+                run_pipeline(subdomains, ports=ports, workers=workers, engine=engine, skip=skip,
+                             analysis_pool=analysis_pool, on_result=journal.record,
+                             known_ports=known_ports)
+            )
+            resolved = results["assets"]
+            assets_file = save(domain, "assets", resolved)
+        else:
+            if resumed and resumed.assets is not None:
+                print(f"[•] Resuming with {len(resumed.assets)} journaled assets")
+                resolved = resumed.assets
+            else:
+                # --- Subdomain scan
+                subdomains = run_sublist3r(domain)
+                resolved = resolve_subdomains(subdomains)
+                journal.record_assets(resolved)
+            assets_file = save(domain, "assets", resolved)
+            if queue is not None:
+                job = f"{domain}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                results = _run_distributed_stages(queue, job, resolved, ports, workers, engine, skip,
+                                                  known_ports)
+            else:
+                results = _run_batch_stages(resolved, ports, workers, engine, skip, analysis_pool,
+                                            on_result=journal.record, known_ports=known_ports)
+    except BaseException:
+        journal.close()
+        print(f"[!] Scan interrupted; rerun with --resume to continue from {journal.path}")
+        raise
+
+    if resumed:
+        for stage in ("ports", "ssl", "tech"):
+            results[stage] = merge(resolved, resumed.carried(stage, resolved), results[stage])
+
+    if previous:
+        for stage in ("ports", "ssl", "tech"):
+            carried = {
+                asset["subdomain"]: previous.fresh(stage, asset)
+                for asset in resolved if fresh(stage, asset)
+            }
+            results[stage] = merge(resolved, carried, results[stage])
+
+    port_results, ssl_results, tech_results = results["ports"], results["ssl"], results["tech"]
+
+    ports_file = save(domain, "ports", port_results)
+    ssl_file = save(domain, "ssl_results",
+                    compact_results(ssl_results) if output_format == "json" else ssl_results)
+    tech_file = save(domain, "tech_stack", tech_results)
 
     print("\n[✓] All scans complete.")
     print(f" - Assets: {assets_file}")
@@ -51,21 +324,108 @@ def run_all(domain, ports: str = "1-100", workers: int = 100):
     print(f" - SSL: {ssl_file}")
     print(f" - Tech Stack: {tech_file}")
 
-    return {
+    files = {
         "assets": assets_file,
         "ports": ports_file,
         "ssl": ssl_file,
         "tech": tech_file,
     }
 
+    if previous:
+        diff = diff_runs(previous, resolved, port_results, ssl_results)
+        files["diff"] = save_json(domain, "diff", diff)
+        print(f" - Diff: {files['diff']} ({len(diff['new_subdomains'])} new subdomains, "
+              f"{len(diff['opened_ports'])} opened ports, {len(diff['cert_changes'])} cert changes)")
+
+    journal.close(remove=True)
+    return files
+
+
+def load_domains(path):
+    """Read one domain per line, ignoring blank lines, ``#`` comments and repeats."""
+    with open(path) as f:
+        lines = (line.split("#", 1)[0].strip().lower() for line in f)
+        return list(dict.fromkeys(line for line in lines if line))
+
+
+def run_batch(domains, parallel: int = config.BATCH_DOMAINS,
+              analysis_workers: int = config.ANALYSIS_WORKERS, **options):
+    """Run :func:`run_all` for many domains in one process.
+
+    Up to ``parallel`` domains are scanned at once, each picking the next
+    domain off the list when it finishes. All of them share the rate
+    scheduler, DNS and certificate caches, the loaded Wappalyzer instance
+    and one analysis process pool. ``options`` are passed to ``run_all``.
+    Returns ``{domain: files}``, with ``{"error": ...}`` for failed domains.
+    """
+    domains = list(dict.fromkeys(domains))
+    results = {}
+    analysis_pool = create_analysis_pool(analysis_workers) if domains else None
+    with ThreadPoolExecutor(max_workers=max(1, min(parallel, len(domains)))) as executor, \
+            (analysis_pool or nullcontext()):
+        futures = {
+            executor.submit(run_all, domain, analysis_pool=analysis_pool, **options): domain
+            for domain in domains
+        }
+        for future in as_completed(futures):
+            domain = futures[future]
+            try:
+                results[domain] = future.result()
+            except Exception as e:
+                print(f"[!] Scan failed for {domain}: {e}")
+                results[domain] = {"error": str(e)}
+
+    failed = sum("error" in files for files in results.values())
+    print(f"\n[✓] Batch complete: {len(domains) - failed}/{len(domains)} domains scanned.")
+    return {domain: results[domain] for domain in domains}
+
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser(description="Run all scanners for a target domain.")
-    parser.add_argument("--domain", required=True, help="Target root domain (e.g. example.com)")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--domain", help="Target root domain (e.g. example.com)")
+    target.add_argument("--domains-file", help="File with one target domain per line")
+    target.add_argument("--worker", action="store_true",
+                        help="Scan work units from --queue until stopped")
     parser.add_argument("--ports", default="1-100", help="Port range (default: 1-100)")
     parser.add_argument("--workers", type=int, default=100, help="Concurrent connections")
+    parser.add_argument("--engine", choices=PORT_ENGINES, default="nmap", help="Port scan engine")
+    parser.add_argument("--stream", action="store_true",
+                        help="Stream resolved assets straight into the scanners")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reuse fresh results from the previous run and save a diff")
+    parser.add_argument("--freshness", type=float, default=24,
+                        help="Hours previous results stay fresh in incremental mode")
+    parser.add_argument("--rate", type=float, default=config.GLOBAL_RATE,
+                        help="Requests per second across all targets (0 = unlimited)")
+    parser.add_argument("--per-ip-rate", type=float, default=config.PER_IP_RATE,
+                        help="Requests per second against one IP (0 = unlimited)")
+    parser.add_argument("--parallel-domains", type=int, default=config.BATCH_DOMAINS,
+                        help="Domains scanned at once with --domains-file")
+    parser.add_argument("--distributed", action="store_true",
+                        help="Coordinate only: queue work units for --worker processes")
+    parser.add_argument("--queue", default=str(config.WORK_QUEUE_FILE),
+                        help="SQLite work queue shared by coordinator and workers")
+    parser.add_argument("--exit-when-idle", action="store_true",
+                        help="Stop the worker once the queue is empty")
+    parser.add_argument("--resume", action="store_true",
+                        help="Continue an interrupted scan from its journal")
+    parser.add_argument("--output-format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Write results as indented JSON or (gzipped) JSON Lines")
     args = parser.parse_args()
 
-    run_all(args.domain, ports=args.ports, workers=args.workers)
+    scheduler.configure(args.rate, args.per_ip_rate)
+
+    options = dict(ports=args.ports, workers=args.workers, engine=args.engine,
+                   stream=args.stream, incremental=args.incremental,
+                   freshness_hours=args.freshness, resume=args.resume,
+                   output_format=args.output_format,
+                   queue=WorkQueue(args.queue) if args.distributed else None)
+    if args.worker:
+        run_worker(WorkQueue(args.queue), exit_when_idle=args.exit_when_idle)
+    elif args.domains_file:
+        run_batch(load_domains(args.domains_file), parallel=args.parallel_domains, **options)
+    else:
+        run_all(args.domain, **options)
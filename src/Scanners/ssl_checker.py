@@ -1,16 +1,26 @@
 import ssl
 import socket
+import hashlib
 import json
 import os
+import tempfile
 import argparse
 import logging
 import asyncio
 from datetime import datetime
 from dateutil import parser as date_parser
-import pytz
 
-from src.utils import config, helpers
+try:
+    from cryptography import x509
+    from cryptography.x509.oid import NameOID
+except ImportError:  # optional; the stdlib decoder is used instead
+    x509 = None
+
+from src.Scanners.cert_store import CertificateCache, compact_results, days_until
+from src.Scanners.subdomain_scanner import lookup_async
+from src.utils import config, dns_cache, helpers
 from src.utils.logger import get_logger
+from src.utils.scheduler import get_scheduler
 
 logger = get_logger(__name__)
 
@@ -25,70 +35,347 @@ def get_ssl_certificate(domain):
         logging.error(f"Error retrieving SSL certificate for {domain}: {e}")
         return {"error": str(e)}
 
-async def get_ssl_certificate_async(domain):
-    """Asynchronous version of get_ssl_certificate using asyncio connections."""
+# getpeercert() attribute names for the common certificate name fields
+_NAME_FIELDS = {
+    "commonName": "COMMON_NAME",
+    "countryName": "COUNTRY_NAME",
+    "stateOrProvinceName": "STATE_OR_PROVINCE_NAME",
+    "localityName": "LOCALITY_NAME",
+    "organizationName": "ORGANIZATION_NAME",
+    "organizationalUnitName": "ORGANIZATIONAL_UNIT_NAME",
+    "emailAddress": "EMAIL_ADDRESS",
+    "serialNumber": "SERIAL_NUMBER",
+    "domainComponent": "DOMAIN_COMPONENT",
+}
+
+
+def _asn1_time(value):
+    # Same layout as OpenSSL's ASN1_TIME_print, e.g. "Oct  8 15:23:14 2026 GMT"
+    return f"{value:%b} {value.day:2d} {value:%H:%M:%S %Y} GMT"
+
+
+def _decode_with_cryptography(der):
+    cert = x509.load_der_x509_certificate(der)
+    names = {getattr(NameOID, oid): name for name, oid in _NAME_FIELDS.items()}
+
+    def name(value):
+        return tuple(
+            tuple((names.get(attr.oid, attr.oid.dotted_string), attr.value) for attr in rdn)
+            for rdn in value.rdns
+        )
+
+    serial = f"{cert.serial_number:X}"
+    decoded = {
+        "subject": name(cert.subject),
+        "issuer": name(cert.issuer),
+        "version": cert.version.value + 1,
+        "serialNumber": serial.zfill(len(serial) + len(serial) % 2),
+        "notBefore": _asn1_time(getattr(cert, "not_valid_before_utc", None) or cert.not_valid_before),
+        "notAfter": _asn1_time(getattr(cert, "not_valid_after_utc", None) or cert.not_valid_after),
+    }
     try:
-        context = ssl.create_default_context()
-        reader, writer = await asyncio.open_connection(domain, 443, ssl=context)
-        cert = writer.get_extra_info("ssl_object").getpeercert()
-        writer.close()
-        await writer.wait_closed()
+        san = cert.extensions.get_extension_for_class(x509.SubjectAlternativeName).value
+    except x509.ExtensionNotFound:
+        return decoded
+    decoded["subjectAltName"] = tuple(
+        [("DNS", value) for value in san.get_values_for_type(x509.DNSName)]
+        + [("IP Address", str(value)) for value in san.get_values_for_type(x509.IPAddress)]
+    )
+    return decoded
+
+
+def decode_der_certificate(der):
+    """Decode a DER certificate into the ``getpeercert()`` dict format.
+
+    Uses ``cryptography`` when it is installed. Otherwise it falls back to
+    CPython's private PEM test decoder (round-tripping through a temporary
+    file), and raises a clear error on interpreters that no longer have it.
+    """
+    if x509 is not None:
+        return _decode_with_cryptography(der)
+    decode = getattr(getattr(ssl, "_ssl", None), "_test_decode_cert", None)
+    if decode is None:
+        raise RuntimeError("Decoding unverified certificates needs the 'cryptography' package")
+    with tempfile.NamedTemporaryFile("w", suffix=".pem", delete=False) as f:
+        f.write(ssl.DER_cert_to_PEM_cert(der))
+    try:
+        return decode(f.name)
+    finally:
+        os.unlink(f.name)
+
+def _peer_chain(ssl_object):
+    """Return the certificate chain sent by the peer as DER bytes, leaf first."""
+    getter = getattr(ssl_object, "get_unverified_chain", None)
+    if getter is None:
+        getter = getattr(getattr(ssl_object, "_sslobj", None), "get_unverified_chain", None)
+    chain = getter() if getter else None
+    if not chain:
+        return [ssl_object.getpeercert(binary_form=True)]
+    return [c if isinstance(c, bytes) else c.public_bytes(ssl._ssl.ENCODING_DER) for c in chain]
+
+async def _read_reply(reader, done):
+    """Read protocol lines until ``done(line)`` is true; return the final line."""
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            raise ConnectionError("Connection closed during STARTTLS negotiation")
+        if done(line):
+            return line
+
+async def _expect(reader, done, ok):
+    line = await _read_reply(reader, done)
+    if not ok(line):
+        raise ssl.SSLError(f"STARTTLS refused: {line}")
+
+def _last_line(line):
+    # SMTP and FTP continue multi-line replies with "250-" style prefixes
+    return line[3:4] != "-"
+
+async def _starttls_smtp(reader, writer):
+    await _expect(reader, _last_line, lambda line: line.startswith("220"))
+    writer.write(b"EHLO scanner.local\r\n")
+    await _expect(reader, _last_line, lambda line: line.startswith("250"))
+    writer.write(b"STARTTLS\r\n")
+    await _expect(reader, _last_line, lambda line: line.startswith("220"))
+
+async def _starttls_imap(reader, writer):
+    await _expect(reader, lambda line: True, lambda line: line.startswith("* OK"))
+    writer.write(b"a1 STARTTLS\r\n")
+    await _expect(reader, lambda line: line.startswith("a1 "), lambda line: line.startswith("a1 OK"))
+
+async def _starttls_pop3(reader, writer):
+    await _expect(reader, lambda line: True, lambda line: line.startswith("+OK"))
+    writer.write(b"STLS\r\n")
+    await _expect(reader, lambda line: True, lambda line: line.startswith("+OK"))
+
+async def _starttls_ftp(reader, writer):
+    await _expect(reader, _last_line, lambda line: line.startswith("220"))
+    writer.write(b"AUTH TLS\r\n")
+    await _expect(reader, _last_line, lambda line: line.startswith("234"))
+
+STARTTLS_HANDLERS = {
+    "smtp": _starttls_smtp,
+    "imap": _starttls_imap,
+    "pop3": _starttls_pop3,
+    "ftp": _starttls_ftp,
+}
+
+# Port -> how to reach TLS on it: "tls" for implicit TLS, otherwise the
+# STARTTLS_HANDLERS protocol to negotiate first
+TLS_PORTS = {
+    443: "tls",
+    8443: "tls",
+    993: "tls",
+    995: "tls",
+    465: "tls",
+    636: "tls",
+    990: "tls",
+    5061: "tls",
+    25: "smtp",
+    587: "smtp",
+    143: "imap",
+    110: "pop3",
+    21: "ftp",
+}
+
+async def _handshake(ip, port, domain, context, timeout):
+    protocol = TLS_PORTS.get(port, "tls")
+
+    async def connect():
+        if protocol == "tls":
+            _, writer = await asyncio.open_connection(ip, port, ssl=context, server_hostname=domain)
+            return writer.transport
+        reader, writer = await asyncio.open_connection(ip, port)
+        try:
+            await STARTTLS_HANDLERS[protocol](reader, writer)
+            loop = asyncio.get_running_loop()
+            return await loop.start_tls(
+                writer.transport, writer.transport.get_protocol(), context, server_hostname=domain
+            )
+        except BaseException:
+            writer.close()
+            raise
+
+    transport = await asyncio.wait_for(connect(), timeout)
+    try:
+        ssl_object = transport.get_extra_info("ssl_object")
+        return ssl_object.getpeercert(), _peer_chain(ssl_object)
+    finally:
+        transport.close()
+
+async def get_ssl_certificate_async(domain, ip=None, port=443, timeout=config.TLS_TIMEOUT):
+    """Asynchronous version of get_ssl_certificate using asyncio connections.
+
+    When ``ip`` is given the connection goes straight to that address with
+    ``domain`` sent as SNI; otherwise the address comes from the shared DNS
+    cache. Ports listed in ``TLS_PORTS`` with a STARTTLS protocol are
+    upgraded after the plain-text negotiation.
+
+    Certificates that fail verification (expired, self-signed, wrong name)
+    are still collected: the handshake is repeated without verification and
+    the DER certificate is decoded locally. The returned dict carries
+    ``verified``, ``verify_error`` and the DER ``chain`` next to the usual
+    ``getpeercert()`` fields.
+    """
+    try:
+        if not ip:
+            ip = (await lookup_async(domain, cache=dns_cache.get_cache()))[0]
+        try:
+            cert, chain = await _handshake(ip, port, domain, ssl.create_default_context(), timeout)
+            cert.update(verified=True, chain=chain)
+        except ssl.SSLCertVerificationError as e:
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+            _, chain = await _handshake(ip, port, domain, context, timeout)
+            cert = decode_der_certificate(chain[0])
+            cert.update(verified=False, verify_error=e.verify_message or str(e), chain=chain)
         return cert
     except Exception as e:
         logging.error(f"Error retrieving SSL certificate for {domain}: {e}")
         return {"error": str(e)}
 
-def parse_certificate_info(cert):
+def _parse_static_fields(cert):
+    expiry_date = date_parser.parse(cert['notAfter'])
+    info = {
+        "Issuer": dict(x[0] for x in cert['issuer']),
+        "Subject": dict(x[0] for x in cert['subject']),
+        "Serial Number": cert['serialNumber'],
+        "Version": cert['version'],
+        "Not Before": cert['notBefore'],
+        "Not After": cert['notAfter'],
+    }
+    if "chain" in cert:
+        info["Chain"] = [hashlib.sha256(der).hexdigest() for der in cert["chain"][1:]]
+    return info, expiry_date.timestamp()
+
+def parse_certificate_info(cert, cache=None):
+    """Turn a certificate dict into the result record.
+
+    With a :class:`~src.Scanners.cert_store.CertificateCache` each unique
+    certificate (by SHA-256 of its DER form) is only parsed once; the
+    per-host verification fields are added on every call.
+    """
     if "error" in cert:
         return cert
 
     try:
-        expiry_date = date_parser.parse(cert['notAfter'])
-        current_time = datetime.now(pytz.utc)
-        days_to_expiry = (expiry_date - current_time).days
+        fingerprint = hashlib.sha256(cert["chain"][0]).hexdigest() if "chain" in cert else None
+        cached = cache.get(fingerprint) if cache is not None and fingerprint else None
+        if cached is None:
+            cached = _parse_static_fields(cert)
+            if cache is not None and fingerprint:
+                cache.put(fingerprint, *cached)
+        static, expires_at = cached
+        days_to_expiry = days_until(expires_at)
 
         info = {
-            "Issuer": dict(x[0] for x in cert['issuer']),
-            "Subject": dict(x[0] for x in cert['subject']),
-            "Serial Number": cert['serialNumber'],
-            "Version": cert['version'],
-            "Not Before": cert['notBefore'],
-            "Not After": cert['notAfter'],
+            **static,
             "Days to Expiry": days_to_expiry,
             "is_expired": days_to_expiry < 0
         }
+        if fingerprint:
+            info["Fingerprint"] = fingerprint
+            info["verified"] = cert["verified"]
+            if not cert["verified"]:
+                info["verify_error"] = cert["verify_error"]
         return info
     except Exception as e:
         return {"error": f"Parsing error: {e}"}
 
-def scan_subdomains(subdomains, workers: int = 100):
-    """Scan subdomains concurrently for SSL certificates."""
+_cert_cache = CertificateCache()
+
+async def check_asset_async(item, timeout=config.TLS_TIMEOUT, cache=None, port=443):
+    """Fetch and parse the certificate served on ``port`` for a single asset record.
+
+    ``cache`` defaults to the process-wide in-memory certificate cache.
+    """
+    domain = item["subdomain"]
+    await get_scheduler().acquire(item.get("ip") or domain)
+    logger.info(f"Checking SSL for {domain}:{port}")
+    cert = await get_ssl_certificate_async(domain, item.get("ip"), port=port, timeout=timeout)
+    cert_info = parse_certificate_info(cert, cache if cache is not None else _cert_cache)
+    cert_info.update(subdomain=domain, ip=item.get("ip"), port=port)
+    return cert_info
+
+def open_tls_ports(port_results):
+    """Map each IP to the open ports in ``TLS_PORTS`` found by the port scanner.
 
-    async def worker(item):
-        domain = item["subdomain"]
-        logger.info(f"Checking SSL for {domain}")
-        cert = await get_ssl_certificate_async(domain)
-        cert_info = parse_certificate_info(cert)
-        cert_info["subdomain"] = domain
-        return cert_info
+    Port 443 is left out because it is always probed.
+    """
+    by_ip = {}
+    for record in port_results or []:
+        for entry in record.get("ports", []):
+            if entry.get("state") == "open" and entry["port"] in TLS_PORTS and entry["port"] != 443:
+                by_ip.setdefault(record.get("ip"), set()).add(entry["port"])
+    return {ip: sorted(ports) for ip, ports in by_ip.items()}
+
+def scan_subdomains(subdomains, workers: int = 100, timeout: float = config.TLS_TIMEOUT,
+                    cert_cache=None, port_results=None, on_result=None, port_feed=None):
+    """Scan subdomains concurrently for SSL certificates.
+
+    Port 443 is always checked; with ``port_results`` from the port scanner
+    every other open port in ``TLS_PORTS`` is probed too, all under the same
+    ``workers`` limit, giving one record per (subdomain, port).
+    ``port_feed`` is the streaming alternative for a port scan still in
+    progress: an iterable of per-IP port records, possibly blocking while
+    it waits for the next one. The 443 checks start straight away and the
+    extra ports of each record are queued as it arrives.
+
+    Pass a :class:`~src.Scanners.cert_store.CertificateCache` with a path to
+    reuse parsed certificates across runs; it is saved when the scan ends.
+    ``on_result`` is called with each record as soon as it is checked.
+    """
+    extra_ports = open_tls_ports(port_results)
 
     async def run_all():
         sem = asyncio.Semaphore(workers)
 
-        async def sem_worker(item):
+        async def sem_worker(item, port):
             async with sem:
-                return await worker(item)
+                record = await check_asset_async(item, timeout, cert_cache, port)
+            if on_result:
+                on_result(record)
+            return record
 
-        tasks = [asyncio.create_task(sem_worker(item)) for item in subdomains]
+        tasks = [
+            asyncio.create_task(sem_worker(item, port))
+            for item in subdomains
+            for port in [443] + extra_ports.get(item.get("ip"), [])
+        ]
+        if port_feed is not None:
+            loop = asyncio.get_running_loop()
+            by_ip = {}
+            for item in subdomains:
+                by_ip.setdefault(item.get("ip"), []).append(item)
+            records = iter(port_feed)
+            while (record := await loop.run_in_executor(None, next, records, None)) is not None:
+                for ip, ports in open_tls_ports([record]).items():
+                    tasks += [
+                        asyncio.create_task(sem_worker(item, port))
+                        for item in by_ip.get(ip, [])
+                        for port in ports
+                    ]
         return await asyncio.gather(*tasks)
 
-    return asyncio.run(run_all())
+    results = asyncio.run(run_all())
+    if cert_cache is not None:
+        cert_cache.save()
+    return results
 
-def save_results(domain, results):
+def results_path(domain, output_format="json"):
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_path = os.path.join(config.DATA_DIR, f"{domain}_ssl_results_{timestamp}.json")
+    suffix = helpers.OUTPUT_FORMATS[output_format]
+    return os.path.join(config.DATA_DIR, f"{domain}_ssl_results_{timestamp}{suffix}")
+
+def save_results(domain, results, output_format="json"):
+    """Save results as compact JSON, or one record per line for JSON Lines formats."""
+    output_path = results_path(domain, output_format)
     os.makedirs(config.DATA_DIR, exist_ok=True)
-    helpers.save_json(results, output_path)
+    if output_format == "json":
+        helpers.save_json(compact_results(results), output_path)
+    else:
+        helpers.save_records(results, output_path)
     logger.info(f"SSL scan results saved to {output_path}")
 
 if __name__ == "__main__":
@@ -96,6 +383,12 @@ if __name__ == "__main__":
     parser.add_argument("--domain", required=True, help="Target domain")
     parser.add_argument("--input", required=True, help="Path to resolved subdomains JSON")
     parser.add_argument("--workers", type=int, default=100, help="Concurrent connections")
+    parser.add_argument("--timeout", type=float, default=config.TLS_TIMEOUT,
+                        help="Seconds allowed per TLS handshake")
+    parser.add_argument("--cert-cache", nargs="?", const=str(config.CERT_CACHE_FILE),
+                        help="Persist parsed certificates to this JSON file across runs")
+    parser.add_argument("--format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Output format; JSON Lines records are written as they arrive")
 
     args = parser.parse_args()
 
@@ -103,7 +396,14 @@ if __name__ == "__main__":
         logger.error(f"Input file {args.input} not found.")
         exit(1)
 
-    subdomains = helpers.load_json(args.input, default=[])
+    subdomains = helpers.load_records(args.input, default=[])
 
-    results = scan_subdomains(subdomains, workers=args.workers)
-    save_results(args.domain, results)
+    cert_cache = CertificateCache(args.cert_cache) if args.cert_cache else None
+    if args.format == "json":
+        results = scan_subdomains(subdomains, workers=args.workers, timeout=args.timeout,
+                                  cert_cache=cert_cache)
+        save_results(args.domain, results)
+    else:
+        with helpers.JsonlWriter(results_path(args.domain, args.format)) as writer:
+            scan_subdomains(subdomains, workers=args.workers, timeout=args.timeout,
+                            cert_cache=cert_cache, on_result=writer.write)
@@ -1,15 +1,25 @@
 # scanners/subdomain_scanner.py
+import asyncio
 import subprocess
 import socket
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from src.utils import config, helpers
+from src.utils import config, dns_cache, helpers
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 OUTPUT_DIR = str(config.DATA_DIR)
 
+# getaddrinfo errors that mean the name has no addresses; anything else
+# (EAI_AGAIN, EAI_FAIL, ...) is a resolver failure and is not cached
+NEGATIVE_ERRORS = {
+    code for code in (getattr(socket, "EAI_NONAME", None), getattr(socket, "EAI_NODATA", None))
+    if code is not None
+}
+
 def run_sublist3r(domain):
     """Runs Sublist3r to find subdomains."""
     logger.info(f"Scanning subdomains for: {domain}")
@@ -30,37 +40,117 @@ def run_sublist3r(domain):
     
     return subdomains
 
-def resolve_subdomains(subdomains):
-    """Resolves subdomains to IP addresses."""
-    resolved = []
-    for sub in subdomains:
+async def lookup_async(host, executor=None, timeout: float = config.DNS_TIMEOUT, cache=None,
+                       limit=None):
+    """Return every A/AAAA address for ``host``, IPv4 addresses first.
+
+    When a :class:`~src.utils.dns_cache.DNSCache` is given it is consulted
+    first and updated afterwards; cached and fresh NXDOMAIN answers both
+    raise ``socket.gaierror``. Only answers that the name does not exist or
+    has no addresses are cached; temporary resolver failures are not.
+
+    ``limit`` (an ``asyncio.Semaphore`` sized to the executor) is acquired
+    before the query and released only once its thread returns, even after
+    a timeout, so ``timeout`` never includes waiting for a free thread.
+    """
+    if cache:
+        ips = cache.get(host)
+        if ips == []:
+            raise socket.gaierror(socket.EAI_NONAME, "Name not found (cached)")
+        if ips:
+            return ips
+
+    loop = asyncio.get_running_loop()
+    if limit:
+        await limit.acquire()
+    query = loop.run_in_executor(executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM)
+    if limit:
+        # A timed-out getaddrinfo keeps its thread, so keep the slot until it returns
+        query.add_done_callback(lambda _: limit.release())
+        query = asyncio.shield(query)
+    try:
+        infos = await asyncio.wait_for(query, timeout)
+    except socket.gaierror as e:
+        if cache and e.errno in NEGATIVE_ERRORS:
+            cache.set(host, [])
+        raise
+    ips = sorted(dict.fromkeys(info[4][0] for info in infos), key=lambda ip: ":" in ip)
+    if cache:
+        cache.set(host, ips)
+    return ips
+
+
+async def resolve_stream(subdomains, workers: int = config.DNS_WORKERS,
+                         timeout: float = config.DNS_TIMEOUT, cache=None):
+    """Resolve subdomains concurrently, yielding each asset as soon as it resolves.
+
+    At most ``workers`` lookups are in flight at once, on a dedicated pool
+    of as many threads, and each query is abandoned after ``timeout``
+    seconds. ``cache`` defaults to the shared on-disk DNS cache; pass
+    ``False`` to always query the resolver.
+    """
+    if cache is None:
+        cache = dns_cache.get_cache()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    limit = asyncio.Semaphore(workers)
+
+    async def resolve(sub):
         try:
-            ip = socket.gethostbyname(sub)
-            resolved.append({"subdomain": sub, "ip": ip})
-        except socket.gaierror:
+            ips = await lookup_async(sub, executor, timeout, cache, limit)
+        except (socket.gaierror, UnicodeError):
             logger.warning(f"Unable to resolve {sub}")
-            resolved.append({"subdomain": sub, "ip": None})
-    return resolved
+            ips = []
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out resolving {sub}")
+            ips = []
+        return {"subdomain": sub, "ip": ips[0] if ips else None, "ips": ips}
+
+    try:
+        for future in asyncio.as_completed([resolve(sub) for sub in subdomains]):
+            yield await future
+    finally:
+        # Drop queued lookups when the caller stops early (cancel_futures is 3.9+)
+        if sys.version_info >= (3, 9):
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            executor.shutdown(wait=False)
+
+
+def resolve_subdomains(subdomains, workers: int = config.DNS_WORKERS,
+                       timeout: float = config.DNS_TIMEOUT, cache=None):
+    """Resolves subdomains to IP addresses.
+
+    ``ip`` holds the preferred (IPv4 first) address and ``ips`` every A/AAAA
+    record. Results keep the order of ``subdomains``.
+    """
+    async def run_all():
+        return [asset async for asset in resolve_stream(subdomains, workers, timeout, cache)]
+
+    by_name = {asset["subdomain"]: asset for asset in asyncio.run(run_all())}
+    return [by_name[sub] for sub in subdomains]
 
-def save_results(domain, data):
-    """Saves results as a JSON file."""
+def save_results(domain, data, output_format="json"):
+    """Saves results as a JSON or JSON Lines file."""
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    output_file = os.path.join(OUTPUT_DIR, f"{domain}_assets_{timestamp}.json")
-    helpers.save_json(data, output_file)
+    suffix = helpers.OUTPUT_FORMATS[output_format]
+    output_file = os.path.join(OUTPUT_DIR, f"{domain}_assets_{timestamp}{suffix}")
+    helpers.save_records(data, output_file)
     logger.info(f"Results saved to {output_file}")
 
-def main(domain):
+def main(domain, output_format="json"):
     if not os.path.exists(OUTPUT_DIR):
         os.makedirs(OUTPUT_DIR)
     
     subdomains = run_sublist3r(domain)
     resolved = resolve_subdomains(subdomains)
-    save_results(domain, resolved)
+    save_results(domain, resolved, output_format)
 
 if __name__ == "__main__":
     import argparse
     parser = argparse.ArgumentParser(description="Subdomain Scanner")
     parser.add_argument("--domain", required=True, help="Target domain (e.g., example.com)")
+    parser.add_argument("--format", choices=helpers.OUTPUT_FORMATS, default="json",
+                        help="Output format")
     args = parser.parse_args()
 
-    main(args.domain)
+    main(args.domain, args.format)
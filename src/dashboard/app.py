@@ -4,6 +4,7 @@ from pathlib import Path
 import streamlit as st
 
 from src.Scanners.run_scanners import run_all
+from src.Scanners.tech_scanner import get_wappalyzer
 from src.ML.risk_model import calculate_risk_scores
 
 
@@ -20,8 +21,15 @@ def display_scores(scores):
     st.table([{"Subdomain": s["subdomain"], "Score": s["risk_score"]} for s in scores])
 
 
+@st.cache_resource
+def load_fingerprints():
+    """Load the Wappalyzer fingerprints once for every dashboard session."""
+    return get_wappalyzer()
+
+
 def main():
     st.title("Athenian Tech Dashboard")
+    load_fingerprints()
 
     if "scan_files" not in st.session_state:
         st.session_state["scan_files"] = {}
@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 # Base project directory (one level up from this file)
@@ -11,9 +12,89 @@ PROCESSED_DIR = DATA_DIR / "processed"
 # Models directory
 MODELS_DIR = ROOT_DIR / "ML" / "models"
 
+# JSON library used for every load/save ("orjson", "msgspec" or "json");
+# unset picks the fastest one installed
+JSON_BACKEND = os.environ.get("JSON_BACKEND") or None
+
 # Default log file
 LOG_FILE = ROOT_DIR.parent / "app.log"
 
 # Default scanning settings
 DEFAULT_PORT_RANGE = "1-1000"
-DEFAULT_WORKERS = 50
\ No newline at end of file
+DEFAULT_WORKERS = 50
+# Hosts grouped into a single nmap invocation
+NMAP_BATCH_SIZE = 16
+# Async TCP connect engine: seconds per connect attempt and probes in flight per host
+CONNECT_TIMEOUT = 1.5
+PROBES_PER_HOST = 32
+# DNS resolution: lookups in flight and seconds allowed per query
+DNS_WORKERS = 64
+DNS_TIMEOUT = 5.0
+
+# Persistent DNS cache; getaddrinfo does not expose record TTLs so a fixed
+# TTL is applied, with a shorter one for names that failed to resolve
+DNS_CACHE_FILE = DATA_DIR / "dns_cache.sqlite"
+DNS_CACHE_TTL = 3600
+DNS_NEGATIVE_TTL = 300
+
+# Items buffered between streaming pipeline stages before producers block
+PIPELINE_QUEUE_SIZE = 256
+
+# Prebuilt artefacts reused across runs (e.g. the Wappalyzer fingerprint set)
+CACHE_DIR = DATA_DIR / "cache"
+
+# Processes running Wappalyzer analysis off the event loop (0 = analyse in-loop)
+ANALYSIS_WORKERS = os.cpu_count() or 1
+
+# Tech scanner: bytes of each response body kept, seconds allowed per HTTP
+# request and per host
+MAX_BODY_BYTES = 1 << 20
+FETCH_TIMEOUT = 3
+HOST_DEADLINE = 15
+# Concurrent fetches against one IP and redirects followed per fetch
+FETCHES_PER_IP = 4
+MAX_REDIRECTS = 5
+
+# Seconds allowed for a TLS connect + handshake
+TLS_TIMEOUT = 5
+# Optional on-disk copy of parsed certificates, keyed by SHA-256 fingerprint
+CERT_CACHE_FILE = CACHE_DIR / "certificates.json"
+
+# Politeness limits shared by all scanners: requests per second across every
+# target and per target IP (0 disables a limit), plus the per-IP burst size
+GLOBAL_RATE = 2000
+PER_IP_RATE = 50
+PER_IP_BURST = 20
+
+# Domains scanned at once in multi-domain batch mode
+BATCH_DOMAINS = 4
+
+# Distributed mode: shared work queue, seconds a worker may hold a unit
+# without renewing it, attempts per unit, IPs per unit and seconds between polls
+WORK_QUEUE_FILE = DATA_DIR / "work_queue.sqlite"
+WORK_LEASE_SECONDS = 300
+WORK_MAX_ATTEMPTS = 3
+WORK_UNIT_SIZE = 16
+WORK_POLL_SECONDS = 2
+
+# Seconds between fsyncs of the scan journal used by --resume
+CHECKPOINT_INTERVAL = 5
+
+# Leak entries vectorised and classified per batch
+LEAK_BATCH_SIZE = 2048
+
+# Model registry: joblib mmap mode for numpy arrays in model pickles and the
+# local inference server address. None loads models into memory; "r" shares
+# pages between processes but a model file rewritten in place while mapped
+# can crash them, so only enable it when models are replaced atomically
+MODEL_MMAP_MODE = None
+INFERENCE_HOST = "127.0.0.1"
+INFERENCE_PORT = 8765
+
+# spaCy entity extraction: texts per nlp.pipe batch and worker processes.
+# Each extra process loads its own copy of the model, so multiprocessing is
+# opt-in (--n-process) and only pays off on large inputs
+NER_BATCH_SIZE = 256
+NER_PROCESSES = 1
+# spaCy model loaded on first NER use
+SPACY_MODEL = "en_core_web_sm"
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from . import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class DNSCache:
+    """SQLite-backed hostname -> addresses cache with TTL expiry.
+
+    An empty address list is a negative entry (NXDOMAIN) and expires after
+    ``negative_ttl`` seconds. Safe to share between threads.
+    """
+
+    def __init__(self, path: str | Path = config.DNS_CACHE_FILE,
+                 ttl: float = config.DNS_CACHE_TTL,
+                 negative_ttl: float = config.DNS_NEGATIVE_TTL):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS dns ("
+            "hostname TEXT PRIMARY KEY, ips TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def _key(hostname: str) -> str:
+        return hostname.strip().rstrip(".").lower()
+
+    def get(self, hostname: str) -> list[str] | None:
+        """Return cached addresses, ``[]`` for a cached NXDOMAIN or None on a miss."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT ips, expires FROM dns WHERE hostname = ?", (self._key(hostname),)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return json.loads(row[0])
+
+    def set(self, hostname: str, ips: list[str], ttl: float | None = None) -> None:
+        """Store addresses for ``hostname``; an empty list is cached as negative."""
+        if ttl is None:
+            ttl = self.ttl if ips else self.negative_ttl
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dns (hostname, ips, expires) VALUES (?, ?, ?)",
+                (self._key(hostname), json.dumps(list(ips)), time.time() + ttl),
+            )
+
+    def purge(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        with self._lock:
+            cur = self._conn.execute("DELETE FROM dns WHERE expires < ?", (time.time(),))
+        return cur.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_cache() -> DNSCache:
+    """Return the process-wide cache stored under ``config.DNS_CACHE_FILE``."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = DNSCache()
+            logger.info(f"Using DNS cache at {_shared.path}")
+        return _shared
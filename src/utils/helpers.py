@@ -1,18 +1,35 @@
-import json
+from __future__ import annotations
+
+import gzip
+import threading
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator
 
+from . import serializer
 from .logger import get_logger
 
 logger = get_logger(__name__)
 
+# File suffix written for each output format
+OUTPUT_FORMATS = {"json": ".json", "jsonl": ".jsonl", "jsonl.gz": ".jsonl.gz"}
+
+
+def is_jsonl(path: str | Path) -> bool:
+    """True for JSON Lines paths (``.jsonl``, optionally gzip-compressed)."""
+    return str(path).endswith((".jsonl", ".jsonl.gz"))
+
+
+def _open_binary(path: Path, mode: str):
+    if path.suffix == ".gz":
+        return gzip.open(path, mode + "b")
+    return path.open(mode + "b")
+
 
 def load_json(path: str | Path, default: Any = None) -> Any:
     """Load JSON data from a file."""
     p = Path(path)
     if p.exists():
-        with p.open('r', encoding='utf-8') as f:
-            return json.load(f)
+        return serializer.loads(p.read_bytes())
     logger.warning(f"JSON file not found: {p}")
     return default if default is not None else []
 
@@ -21,6 +38,81 @@ def save_json(data: Any, path: str | Path) -> None:
     """Save data as JSON."""
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open('w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2)
-    logger.info(f"Saved JSON to {p}")
\ No newline at end of file
+    p.write_bytes(serializer.dumps(data, indent=True))
+    logger.info(f"Saved JSON to {p}")
+
+
+class JsonlWriter:
+    """Append records to a JSON Lines file one line at a time.
+
+    Paths ending in ``.gz`` are gzip-compressed. Each record is written as
+    soon as it arrives, so scanners can stream results instead of holding
+    them all until the end. Safe to share between threads.
+    """
+
+    def __init__(self, path: str | Path, append: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = _open_binary(self.path, "a" if append else "w")
+
+    def write(self, record: Any) -> None:
+        line = serializer.dumps(record) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self.count += 1
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        logger.info(f"Saved {self.count} records to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_jsonl(path: str | Path) -> Iterator[Any]:
+    """Lazily yield the records of a JSON Lines file, skipping blank lines."""
+    p = Path(path)
+    if not p.exists():
+        logger.warning(f"JSONL file not found: {p}")
+        return
+    with _open_binary(p, "r") as f:
+        for line in f:
+            if line.strip():
+                yield serializer.loads(line)
+
+
+def iter_records(path: str | Path) -> Iterator[Any]:
+    """Yield the records of a JSON Lines file lazily, or of a JSON list once loaded."""
+    if is_jsonl(path):
+        yield from iter_jsonl(path)
+    else:
+        yield from load_json(path, default=[])
+
+
+def save_records(records: Iterable[Any], path: str | Path) -> None:
+    """Save a list of records as JSON Lines or JSON depending on the path suffix."""
+    if is_jsonl(path):
+        with JsonlWriter(path) as writer:
+            writer.write_many(records)
+    else:
+        save_json(list(records), path)
+
+
+def load_records(path: str | Path, default: Any = None) -> Any:
+    """Load records saved by :func:`save_records` (or any JSON file) from ``path``."""
+    if is_jsonl(path):
+        if not Path(path).exists():
+            logger.warning(f"JSONL file not found: {path}")
+            return default if default is not None else []
+        return list(iter_jsonl(path))
+    return load_json(path, default)
@@ -0,0 +1,26 @@
+import threading
+
+from . import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+_models = {}
+_lock = threading.Lock()
+
+
+def load_spacy(name: str = config.SPACY_MODEL, disable=()):
+    """Return the spaCy pipeline ``name`` with ``disable`` components off.
+
+    spaCy itself is only imported on the first call, and each (model,
+    disabled components) pair is loaded once per process and shared by
+    every caller.
+    """
+    key = (name, tuple(sorted(disable)))
+    with _lock:
+        if key not in _models:
+            import spacy
+
+            logger.info(f"Loading spaCy model {name}")
+            _models[key] = spacy.load(name, disable=list(disable))
+        return _models[key]
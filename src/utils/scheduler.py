@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+
+from . import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class TokenBucket:
+    """Token bucket refilled at ``rate`` tokens per second up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float | None = None, now: float | None = None):
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self.tokens = self.burst
+        self.updated = time.monotonic() if now is None else now
+
+    def reserve(self, now: float, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens and return how long the caller must wait for them.
+
+        Tokens may go negative: a reservation is granted up front and later
+        callers queue behind it, so waiting never requires polling.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= cost
+        return max(0.0, -self.tokens / self.rate)
+
+
+class RateScheduler:
+    """Politeness scheduler shared by every scanner.
+
+    Each request against a target first takes a token from that target's
+    bucket (``per_ip_rate``) and from one global bucket (``global_rate``),
+    so port, SSL and tech scans together never exceed either limit. A rate
+    of 0 or None disables that limit. Safe to share between threads and
+    event loops: reservations are made under a lock and callers then sleep
+    on their own.
+    """
+
+    def __init__(self, global_rate: float | None = config.GLOBAL_RATE,
+                 per_ip_rate: float | None = config.PER_IP_RATE,
+                 per_ip_burst: float | None = config.PER_IP_BURST):
+        self.global_rate = global_rate
+        self.per_ip_rate = per_ip_rate
+        self.per_ip_burst = per_ip_burst
+        self._global = TokenBucket(global_rate) if global_rate else None
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, target, cost: float = 1.0) -> float:
+        """Reserve ``cost`` requests against ``target`` and return the delay in seconds."""
+        now = time.monotonic()
+        delay = 0.0
+        with self._lock:
+            if self.per_ip_rate and target:
+                bucket = self._buckets.get(target)
+                if bucket is None:
+                    bucket = self._buckets[target] = TokenBucket(
+                        self.per_ip_rate, self.per_ip_burst, now
+                    )
+                delay = bucket.reserve(now, cost)
+            if self._global is not None:
+                delay = max(delay, self._global.reserve(now, cost))
+        return delay
+
+    async def acquire(self, target, cost: float = 1.0):
+        delay = self.reserve(target, cost)
+        if delay:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, target, cost: float = 1.0):
+        delay = self.reserve(target, cost)
+        if delay:
+            time.sleep(delay)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def get_scheduler() -> RateScheduler:
+    """Return the process-wide scheduler, created with the ``config`` limits."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RateScheduler()
+        return _shared
+
+
+def configure(global_rate=config.GLOBAL_RATE, per_ip_rate=config.PER_IP_RATE,
+              per_ip_burst=config.PER_IP_BURST) -> RateScheduler:
+    """Replace the process-wide scheduler with one using the given limits."""
+    global _shared
+    with _shared_lock:
+        _shared = RateScheduler(global_rate, per_ip_rate, per_ip_burst)
+        logger.info(f"Rate limits: {global_rate or 'unlimited'}/s global, "
+                    f"{per_ip_rate or 'unlimited'}/s per IP")
+        return _shared
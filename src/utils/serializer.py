@@ -0,0 +1,60 @@
+"""JSON encoding backend shared by every load/save path.
+
+orjson is used when installed, then msgspec, then the standard library.
+``config.JSON_BACKEND`` (or the ``JSON_BACKEND`` environment variable)
+forces one of ``orjson``, ``msgspec`` or ``json``. All backends encode to
+UTF-8 bytes and decode from ``bytes`` or ``str``.
+"""
+import json
+
+from . import config
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+def _stdlib_dumps(obj, indent=False):
+    return json.dumps(obj, indent=2 if indent else None).encode("utf-8")
+
+
+def _load_backend(name):
+    if name == "orjson":
+        import orjson
+
+        def dumps(obj, indent=False):
+            option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(obj, option=option)
+
+        return dumps, orjson.loads
+    if name == "msgspec":
+        import msgspec
+
+        encoder, decoder = msgspec.json.Encoder(), msgspec.json.Decoder()
+
+        def dumps(obj, indent=False):
+            data = encoder.encode(obj)
+            return msgspec.json.format(data, indent=2) if indent else data
+
+        return dumps, decoder.decode
+    if name == "json":
+        return _stdlib_dumps, json.loads
+    raise ValueError(f"Unknown JSON backend: {name}")
+
+
+def select_backend(preferred=config.JSON_BACKEND):
+    """Return ``(name, dumps, loads)`` for ``preferred`` or the fastest installed backend."""
+    if preferred:
+        return (preferred, *_load_backend(preferred))
+    for name in BACKENDS:
+        try:
+            return (name, *_load_backend(name))
+        except ImportError:
+            continue
+
+
+BACKEND, dumps, loads = select_backend()
+logger.debug(f"Using {BACKEND} for JSON")
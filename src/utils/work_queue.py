@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from . import config, serializer
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+PENDING, LEASED, DONE, FAILED = "pending", "leased", "done", "failed"
+
+
+class WorkQueue:
+    """SQLite-backed queue of work units shared by a coordinator and its workers.
+
+    Workers lease a unit for ``lease_seconds`` and must complete, fail or
+    renew it before the lease runs out; units held by a worker that died are
+    handed out again once their lease expires. A unit that fails
+    ``max_attempts`` times is marked failed. Any process that can open the
+    database file (local disk or a filesystem with working locks) can join.
+    """
+
+    def __init__(self, path: str | Path = config.WORK_QUEUE_FILE,
+                 lease_seconds: float = config.WORK_LEASE_SECONDS,
+                 max_attempts: int = config.WORK_MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS units ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job TEXT NOT NULL, payload TEXT NOT NULL, "
+            "status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, "
+            "worker TEXT, lease_until REAL, result TEXT, error TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS units_status ON units (status, job)")
+
+    def put(self, job: str, payloads) -> int:
+        """Queue one unit per payload under ``job`` and return how many were added."""
+        rows = [(job, serializer.dumps(payload), PENDING) for payload in payloads]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO units (job, payload, status) VALUES (?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def lease(self, worker: str) -> dict | None:
+        """Claim the oldest pending or expired unit for ``worker``, or None if idle."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id, job, payload, attempts FROM units "
+                    "WHERE status = ? OR (status = ? AND lease_until < ? AND attempts < ?) "
+                    "ORDER BY id LIMIT 1",
+                    (PENDING, LEASED, now, self.max_attempts),
+                ).fetchone()
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE units SET status = ?, worker = ?, lease_until = ?, "
+                        "attempts = attempts + 1 WHERE id = ?",
+                        (LEASED, worker, now + self.lease_seconds, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return {"id": row[0], "job": row[1], "payload": serializer.loads(row[2]), "attempt": row[3] + 1}
+
+    def renew(self, unit_id: int, worker: str) -> bool:
+        """Extend a lease still held by ``worker``; False if it was lost."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE units SET lease_until = ? WHERE id = ? AND worker = ? AND status = ?",
+                (time.time() + self.lease_seconds, unit_id, worker, LEASED),
+            )
+        return cur.rowcount == 1
+
+    def complete(self, unit_id: int, worker: str, result) -> bool:
+        """Store ``result`` for a unit; False if the lease had passed to another worker."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE units SET status = ?, result = ?, error = NULL, lease_until = NULL "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                (DONE, serializer.dumps(result), unit_id, worker, LEASED),
+            )
+        return cur.rowcount == 1
+
+    def fail(self, unit_id: int, worker: str, error: str) -> None:
+        """Release a unit for retry, or mark it failed after ``max_attempts``."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE units SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, "
+                "error = ?, lease_until = NULL WHERE id = ? AND worker = ? AND status = ?",
+                (self.max_attempts, FAILED, PENDING, error, unit_id, worker, LEASED),
+            )
+
+    def expire(self) -> int:
+        """Mark units whose lease expired after their last attempt as failed."""
+        with self._lock:
+            cur = self._conn.execute(
+                "UPDATE units SET status = ?, error = 'lease expired' "
+                "WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, LEASED, time.time(), self.max_attempts),
+            )
+        return cur.rowcount
+
+    def counts(self, job: str) -> dict:
+        """Return ``{status: units}`` for ``job``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) FROM units WHERE job = ? GROUP BY status", (job,)
+            ).fetchall()
+        return dict(rows)
+
+    def results(self, job: str) -> list:
+        """Return the results of the finished units of ``job`` in queue order."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM units WHERE job = ? AND status = ? ORDER BY id", (job, DONE)
+            ).fetchall()
+        return [serializer.loads(row[0]) for row in rows]
+
+    def errors(self, job: str) -> list:
+        """Return ``(payload, error)`` for every unit of ``job`` that failed for good."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT payload, error FROM units WHERE job = ? AND status = ? ORDER BY id",
+                (job, FAILED),
+            ).fetchall()
+        return [(serializer.loads(payload), error) for payload, error in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
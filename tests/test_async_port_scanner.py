@@ -0,0 +1,27 @@
+import socket
+
+import pytest
+
+from src.Scanners import async_port_scanner
+
+
+def test_parse_ports():
+    assert async_port_scanner.parse_ports("22, 80-82,80") == [22, 80, 81, 82]
+    with pytest.raises(ValueError):
+        async_port_scanner.parse_ports("0-10")
+
+
+def test_scan_ports_finds_listening_port():
+    with socket.socket() as listener:
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(8)
+        port = listener.getsockname()[1]
+        assets = [
+            {"subdomain": "a.local", "ip": "127.0.0.1"},
+            {"subdomain": "b.local", "ip": "127.0.0.1"},
+            {"subdomain": "c.local", "ip": None},
+        ]
+        results = async_port_scanner.scan_ports(assets, ports=str(port), workers=5, timeout=1)
+
+    assert [r["subdomain"] for r in results] == ["a.local", "b.local"]
+    assert results[0]["ports"] == [{"port": port, "protocol": "tcp", "state": "open"}]
@@ -0,0 +1,27 @@
+from src.Scanners.cert_store import CertificateCache, compact_results, expand_results
+
+
+def test_compact_and_expand_round_trip():
+    cert = {"Issuer": {"commonName": "CA"}, "Serial Number": "01", "Days to Expiry": 10}
+    results = [
+        {**cert, "Fingerprint": "ab", "verified": True, "subdomain": "a.example.com"},
+        {**cert, "Fingerprint": "ab", "verified": False, "subdomain": "b.example.com"},
+        {"error": "timed out", "subdomain": "c.example.com"},
+    ]
+
+    compact = compact_results(results)
+
+    assert compact["certificates"] == {"ab": cert}
+    assert compact["subdomains"][1] == {"Fingerprint": "ab", "verified": False,
+                                        "subdomain": "b.example.com"}
+    assert expand_results(compact) == results
+    assert expand_results(results) == results
+
+
+def test_certificate_cache_persists(tmp_path):
+    path = tmp_path / "certs.json"
+    cache = CertificateCache(path)
+    cache.put("ab", {"Serial Number": "01"}, 1700000000.0)
+    cache.save()
+
+    assert CertificateCache(path).get("ab") == ({"Serial Number": "01"}, 1700000000.0)
@@ -0,0 +1,83 @@
+import sys
+import types
+
+dateutil = types.ModuleType("dateutil")
+parser = types.ModuleType("parser")
+parser.parse = lambda x: x
+dateutil.parser = parser
+sys.modules.setdefault("dateutil", dateutil)
+sys.modules.setdefault("pytz", types.ModuleType("pytz"))
+
+from src.Scanners.checkpoint import Journal, ResumeState, load_journal
+
+
+def test_journal_round_trip_ignores_torn_line(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = Journal(path)
+    journal.record_assets([{"subdomain": "a.example.com", "ip": "1.1.1.1"}])
+    journal.record("ports", {"subdomain": "a.example.com", "ip": "1.1.1.1", "ports": []})
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"stage": "tech", "rec')
+
+    entries = load_journal(path)
+    assert entries["assets"] == [{"subdomain": "a.example.com", "ip": "1.1.1.1"}]
+    assert entries["ports"][0]["ip"] == "1.1.1.1"
+    assert "tech" not in entries
+
+    resumed = Journal(path, resume=True)
+    assert resumed.entries == entries
+    resumed.close(remove=True)
+    assert not path.exists()
+
+
+def test_resume_state_skips_done_work_and_retries_errors():
+    assets = [
+        {"subdomain": "a.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "b.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "c.example.com", "ip": "2.2.2.2"},
+    ]
+    state = ResumeState({
+        "ports": [
+            {"subdomain": "a.example.com", "ip": "1.1.1.1", "ports": []},
+            {"subdomain": "c.example.com", "ip": "2.2.2.2", "ports": [], "error": "timeout"},
+        ],
+        "ssl": [{"subdomain": "a.example.com", "ip": "1.1.1.1", "port": 443}],
+        "tech": [
+            {"subdomain": "a.example.com", "technologies": []},
+            {"subdomain": "c.example.com", "technologies": [], "url": "https://c.example.com/"},
+        ],
+    })
+
+    assert state.assets is None
+    assert [state.done("ports", a) for a in assets] == [True, True, False]
+    assert [state.done("ssl", a) for a in assets] == [True, False, False]
+    assert [state.done("tech", a) for a in assets] == [False, False, True]
+    assert sorted(state.carried("ports", assets)) == ["a.example.com", "b.example.com"]
+
+
+def test_resume_state_tracks_tls_progress_per_port():
+    asset = {"subdomain": "mail.example.com", "ip": "1.1.1.1"}
+    ports = {"subdomain": "mail.example.com", "ip": "1.1.1.1",
+             "ports": [{"port": 993, "protocol": "tcp", "state": "open"}]}
+    https = {"subdomain": "mail.example.com", "ip": "1.1.1.1", "port": 443}
+
+    # Crashed after 443 but before 993
+    assert not ResumeState({"ports": [ports], "ssl": [https]}).done("ssl", asset)
+    # Port scan not journaled yet, so further TLS ports are unknown
+    assert not ResumeState({"ssl": [https]}).done("ssl", asset)
+    assert ResumeState({"ports": [ports], "ssl": [https, dict(https, port=993)]}).done("ssl", asset)
+
+
+def test_journal_without_resume_rotates_existing_checkpoint(tmp_path):
+    path = tmp_path / "example.com_journal.jsonl"
+    journal = Journal(path)
+    journal.record("ports", {"subdomain": "a.example.com", "ip": "1.1.1.1", "ports": []})
+    journal.close()
+
+    fresh = Journal(path)
+    fresh.close()
+
+    assert fresh.rotated is not None and fresh.rotated.name.startswith("example.com_journal_")
+    assert load_journal(fresh.rotated)["ports"][0]["ip"] == "1.1.1.1"
+    assert load_journal(path) == {}
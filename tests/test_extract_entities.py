@@ -0,0 +1,82 @@
+import sys
+import types
+
+
+class FakeEnt:
+    def __init__(self, text, label):
+        self.text, self.label_ = text, label
+
+
+class FakeDoc:
+    def __init__(self, text):
+        self.text = text
+        self.ents = [FakeEnt(w, "ORG") for w in text.split() if w.istitle()]
+        self.ents.append(FakeEnt("Monday", "DATE"))
+
+
+class FakeNLP:
+    def __init__(self, disable=()):
+        self.disabled = list(disable)
+        self.pipe_calls = []
+
+    def __call__(self, text):
+        return FakeDoc(text)
+
+    def pipe(self, items, as_tuples=False, batch_size=None, n_process=1):
+        self.pipe_calls.append((batch_size, n_process))
+        for text, context in items:
+            yield FakeDoc(text), context
+
+
+spacy = types.ModuleType("spacy")
+spacy.load = lambda name, disable=(): FakeNLP(disable)
+sys.modules.setdefault("spacy", spacy)
+tqdm = types.ModuleType("tqdm")
+tqdm.tqdm = lambda iterable, desc=None: iterable
+sys.modules.setdefault("tqdm", tqdm)
+
+from src.Leaks import extract_entities
+
+
+def test_iter_extracted_pipes_sensitive_entries_only(monkeypatch):
+    nlp = FakeNLP(extract_entities.UNUSED_PIPES)
+    monkeypatch.setattr(extract_entities, "get_nlp", lambda: nlp)
+    leaks = [
+        {"label": "sensitive", "text": "Acme admin@acme.com", "source": "a"},
+        {"label": "benign", "text": "Other other@example.com", "source": "b"},
+        {"label": "sensitive", "text": "password: hunter2", "source": "c"},
+    ]
+
+    records = list(extract_entities.iter_extracted(leaks, batch_size=8, n_process=2))
+
+    assert nlp.pipe_calls == [(8, 2)]
+    assert [r["source"] for r in records] == ["a", "c"]
+    assert records[0]["entities"]["org"] == ["Acme"]
+    assert records[0]["entities"]["emails"] == ["admin@acme.com"]
+    assert "date" not in records[0]["entities"]
+    assert records[1]["entities"]["credentials"] == ["hunter2"]
+
+
+def test_regex_only_mode_never_loads_spacy(monkeypatch):
+    monkeypatch.setattr(extract_entities, "load_spacy",
+                        lambda *a: (_ for _ in ()).throw(AssertionError("spaCy loaded")))
+    leaks = [{"label": "sensitive", "text": "Acme server 10.0.0.1", "source": "a"}]
+
+    records = list(extract_entities.iter_extracted(leaks, regex_only=True))
+
+    assert records[0]["entities"] == {
+        "emails": [], "phones": [], "ips": ["10.0.0.1"], "urls": [], "credentials": [],
+    }
+
+
+def test_shared_loader_loads_each_model_once(monkeypatch):
+    from src.utils import nlp_loader
+
+    loaded = []
+    monkeypatch.setattr(nlp_loader, "_models", {})
+    monkeypatch.setattr(sys.modules["spacy"], "load",
+                        lambda name, disable=(): loaded.append(name) or FakeNLP(disable))
+
+    first = nlp_loader.load_spacy("en_core_web_sm", ["parser", "tagger"])
+    assert nlp_loader.load_spacy("en_core_web_sm", ["tagger", "parser"]) is first
+    assert loaded == ["en_core_web_sm"]
@@ -1,7 +1,7 @@
 import json
 from pathlib import Path
 
-from src.utils.helpers import load_json, save_json
+from src.utils.helpers import JsonlWriter, iter_jsonl, load_json, load_records, save_json, save_records
 from src.utils.risk_calculator import calculate_risk_score
 
 
@@ -20,6 +20,25 @@ def test_load_json_missing(tmp_path):
     assert result == {"missing": True}
 
 
+def test_jsonl_writer_streams_records(tmp_path):
+    for name in ("data.jsonl", "data.jsonl.gz"):
+        path = tmp_path / name
+        with JsonlWriter(path) as writer:
+            writer.write({"n": 1})
+            writer.write_many([{"n": 2}, {"n": 3}])
+        assert writer.count == 3
+        assert [r["n"] for r in iter_jsonl(path)] == [1, 2, 3]
+
+
+def test_save_records_picks_format_from_suffix(tmp_path):
+    records = [{"subdomain": "a.example.com"}, {"subdomain": "b.example.com"}]
+    for name in ("out.json", "out.jsonl", "out.jsonl.gz"):
+        save_records(records, tmp_path / name)
+        assert load_records(tmp_path / name) == records
+    assert (tmp_path / "out.jsonl").read_text().count("\n") == 2
+    assert load_records(tmp_path / "missing.jsonl") == []
+
+
 def test_calculate_risk_score_basic():
     assert calculate_risk_score([10, 20, 30]) == 20.0
 
@@ -28,3 +47,14 @@ def test_calculate_risk_score_invalid_values():
     scores = [10, None, "bad", 20]
     assert calculate_risk_score(scores) == 15.0
     assert calculate_risk_score([]) == 0
+
+
+def test_serializer_backends_round_trip():
+    from src.utils import serializer
+
+    data = {"subdomain": "a.example.com", "ports": [22, 443], "nested": {"ok": True}}
+    name, dumps, loads = serializer.select_backend("json")
+    assert name == "json"
+    assert loads(dumps(data, indent=True)) == data
+    assert loads(serializer.dumps(data)) == data
+    assert serializer.BACKEND in serializer.BACKENDS
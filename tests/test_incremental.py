@@ -0,0 +1,66 @@
+from datetime import datetime
+
+from src.Scanners.incremental import PreviousRun, diff_runs, latest_output, merge
+from src.utils.helpers import save_json, save_records
+
+
+def write_previous(tmp_path, stamp="20250101_120000"):
+    save_json([{"subdomain": "a.example.com", "ip": "1.1.1.1"},
+               {"subdomain": "old.example.com", "ip": "3.3.3.3"}],
+              tmp_path / f"example.com_assets_{stamp}.json")
+    save_json([{"subdomain": "a.example.com", "ip": "1.1.1.1",
+                "ports": [{"port": 80, "protocol": "tcp", "state": "open"}]}],
+              tmp_path / f"example.com_ports_{stamp}.json")
+    save_json([{"subdomain": "a.example.com", "Serial Number": "01", "Not After": "x"}],
+              tmp_path / f"example.com_ssl_results_{stamp}.json")
+
+
+def test_latest_output_ignores_other_domains(tmp_path):
+    write_previous(tmp_path, "20240101_000000")
+    write_previous(tmp_path)
+    save_json([], tmp_path / "sub.example.com_ports_20260101_000000.json")
+    path, stamp = latest_output("example.com", "ports", tmp_path)
+    assert path.name == "example.com_ports_20250101_120000.json"
+    assert stamp == datetime(2025, 1, 1, 12)
+
+    save_records([], tmp_path / "example.com_ports_20250601_000000.jsonl.gz")
+    path, _ = latest_output("example.com", "ports", tmp_path)
+    assert path.name == "example.com_ports_20250601_000000.jsonl.gz"
+
+
+def test_fresh_results_are_reused(tmp_path):
+    write_previous(tmp_path)
+    assets = [{"subdomain": "a.example.com", "ip": "1.1.1.1"},
+              {"subdomain": "b.example.com", "ip": "2.2.2.2"}]
+
+    previous = PreviousRun("example.com", 24, tmp_path, now=datetime(2025, 1, 2, 6))
+    stale, carried = previous.split("ports", assets)
+    assert [a["subdomain"] for a in stale] == ["b.example.com"]
+    merged = merge(assets, carried, [{"subdomain": "b.example.com", "ip": "2.2.2.2", "ports": []}])
+    assert [r["subdomain"] for r in merged] == ["a.example.com", "b.example.com"]
+    assert merged[0]["scanned_at"] == "20250101_120000"
+
+    expired = PreviousRun("example.com", 12, tmp_path, now=datetime(2025, 1, 2, 6))
+    assert expired.fresh("ports", assets[0]) is None
+    assert previous.fresh("ports", {"subdomain": "a.example.com", "ip": "9.9.9.9"}) is None
+    assert [r["ip"] for r in previous.port_records()] == ["1.1.1.1"]
+    assert expired.port_records() == []
+
+
+def test_diff_runs(tmp_path):
+    write_previous(tmp_path)
+    previous = PreviousRun("example.com", 24, tmp_path)
+    assets = [{"subdomain": "a.example.com", "ip": "1.1.1.1"},
+              {"subdomain": "b.example.com", "ip": "2.2.2.2"}]
+    ports = [{"subdomain": "a.example.com", "ip": "1.1.1.1",
+              "ports": [{"port": 443, "protocol": "tcp", "state": "open"}]}]
+    ssl = [{"subdomain": "a.example.com", "Serial Number": "02", "Not After": "y"}]
+
+    diff = diff_runs(previous, assets, ports, ssl)
+
+    assert diff["new_subdomains"] == ["b.example.com"]
+    assert diff["removed_subdomains"] == ["old.example.com"]
+    assert diff["opened_ports"] == [{"subdomain": "a.example.com", "port": 443, "protocol": "tcp"}]
+    assert diff["closed_ports"] == [{"subdomain": "a.example.com", "port": 80, "protocol": "tcp"}]
+    assert diff["cert_changes"][0]["after"]["Serial Number"] == "02"
+    assert diff["cert_changes"][0]["port"] == 443
@@ -0,0 +1,41 @@
+import sys
+import types
+
+sys.modules.setdefault("joblib", types.ModuleType("joblib"))
+
+from src.ML import leak_classifier
+from src.utils.helpers import iter_jsonl, save_records
+
+
+class FakeVectorizer:
+    def __init__(self):
+        self.calls = []
+
+    def transform(self, texts):
+        self.calls.append(len(texts))
+        return texts
+
+
+class FakeLabels(list):
+    def tolist(self):
+        return list(self)
+
+
+class FakeClassifier:
+    def predict(self, X):
+        return FakeLabels("sensitive" if "password" in text else "benign" for text in X)
+
+
+def test_classify_leaks_streams_in_batches(monkeypatch, tmp_path):
+    vectorizer = FakeVectorizer()
+    models = {"leak_model.pkl": FakeClassifier(), "vectorizer.pkl": vectorizer}
+    monkeypatch.setattr(leak_classifier, "load_model", lambda path: models[path.name])
+
+    leaks = [{"content": f"line {i}" + (" password" if i % 2 else "")} for i in range(5)]
+    save_records(leaks, tmp_path / "leaks.jsonl")
+
+    leak_classifier.classify_leaks(tmp_path / "leaks.jsonl", tmp_path / "out.jsonl", batch_size=2)
+
+    assert vectorizer.calls == [2, 2, 1]
+    labels = [entry["label"] for entry in iter_jsonl(tmp_path / "out.jsonl")]
+    assert labels == ["benign", "sensitive", "benign", "sensitive", "benign"]
@@ -0,0 +1,90 @@
+import os
+import sys
+import threading
+import types
+
+sys.modules.setdefault("joblib", types.ModuleType("joblib"))
+
+from src.ML import inference_server, leak_classifier, model_registry
+
+
+def test_registry_loads_once_and_reloads_on_change(monkeypatch, tmp_path):
+    loads = []
+
+    def fake_load(path, mmap_mode=None):
+        loads.append((path.name, mmap_mode))
+        return object()
+
+    monkeypatch.setattr(model_registry.joblib, "load", fake_load, raising=False)
+    path = tmp_path / "model.pkl"
+    path.write_bytes(b"v1")
+    registry = model_registry.ModelRegistry(mmap_mode="r")
+
+    first = registry.get(path)
+    assert registry.get(str(path)) is first
+    assert loads == [("model.pkl", "r")]
+
+    path.write_bytes(b"version 2")
+    os.utime(path, ns=(0, 1))
+    assert registry.get(path) is not first
+    assert len(loads) == 2
+
+
+def test_inference_server_classifies_remotely(monkeypatch):
+    monkeypatch.setattr(leak_classifier, "predict_labels",
+                        lambda texts: ["sensitive" if "key" in t else "benign" for t in texts])
+    server = inference_server.create_server("127.0.0.1", 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert inference_server.remote_classify(url, ["api key", "hello"]) == ["sensitive", "benign"]
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_inference_server_rejects_model_paths_and_outside_data(monkeypatch, tmp_path):
+    import urllib.error
+    import urllib.request
+
+    import pytest
+
+    calls = []
+    risk_model = types.ModuleType("src.ML.risk_model")
+    risk_model.calculate_risk_scores = lambda *args: calls.append(args) or []
+    monkeypatch.setitem(sys.modules, "src.ML.risk_model", risk_model)
+    data_dir, models_dir = tmp_path / "data", tmp_path / "models"
+    data_dir.mkdir()
+    models_dir.mkdir()
+    (models_dir / "risk.pkl").write_bytes(b"model")
+    (tmp_path / "evil.pkl").write_bytes(b"pickle")
+    files = {key: str(data_dir / f"{key}.json") for key in ("assets", "ports", "ssl", "leaks")}
+
+    server = inference_server.create_server("127.0.0.1", 0, [data_dir], models_dir)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}"
+        assert inference_server.remote_risk_scores(url, *files.values(), "risk.pkl") == []
+        assert calls[0][-1] == models_dir / "risk.pkl"
+
+        for model in (str(tmp_path / "evil.pkl"), "../evil.pkl", "missing.pkl"):
+            with pytest.raises(urllib.error.HTTPError) as error:
+                inference_server.remote_risk_scores(url, *files.values(), model)
+            assert error.value.code == 403
+
+        outside = dict(files, ports=str(tmp_path / "secrets.json"))
+        with pytest.raises(urllib.error.HTTPError) as error:
+            inference_server.remote_risk_scores(url, *outside.values(), "risk.pkl")
+        assert error.value.code == 403
+
+        request = urllib.request.Request(url + "/classify", data=b'{"texts": []}', method="POST",
+                                         headers={"Content-Type": "text/plain"})
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(request)
+        assert error.value.code == 415
+        assert len(calls) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
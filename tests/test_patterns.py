@@ -0,0 +1,45 @@
+import re
+
+from src.Leaks import patterns
+
+
+def test_entities_match_one_pass_per_pattern():
+    text = ("login: admin@acme.com pass: hunter2 call +919812345678 "
+            "see http://10.0.0.1/admin or https://www.acme.com/?u=bob@acme.com")
+
+    found = {kind: set() for kind in patterns.ENTITIES.kinds}
+    for match in patterns.ENTITIES.finditer(text):
+        found[match.kind].add(match.value)
+        assert text[match.start:match.end] == match.value
+
+    assert found == {
+        "emails": set(re.findall(patterns.EMAIL_REGEX, text)),
+        "phones": set(re.findall(patterns.PHONE_REGEX, text)),
+        "ips": {"10.0.0.1"},
+        "urls": set(re.findall(patterns.URL_REGEX, text)),
+        "credentials": {"admin@acme", "hunter2"},
+    }
+
+
+def test_patterns_without_their_literals_never_run():
+    class Exploding:
+        flags = 0
+        groupindex = {}
+
+        def finditer(self, text):
+            raise AssertionError("pattern ran")
+
+    pattern_set = patterns.PatternSet({"emails": (patterns.EMAIL_REGEX, ("@",))})
+    kind, _, group, literals, folded = pattern_set._patterns[0]
+    pattern_set._patterns[0] = (kind, Exploding(), group, literals, folded)
+
+    assert list(pattern_set.finditer("no addresses here")) == []
+
+
+def test_leak_types_follow_precedence():
+    first = patterns.LEAK_TYPES.first_kind
+
+    assert first("user@acme.com PASSWORD=x token: y") == "credentials"
+    assert first("user@acme.com apikey=y") == "api_key"
+    assert first("contact user@acme.com") == "email"
+    assert first("nothing to see", default="unknown") == "unknown"
@@ -0,0 +1,40 @@
+from src.Scanners.planner import ScanPlan
+
+
+ASSETS = [
+    {"subdomain": "a.example.com", "ip": "1.1.1.1"},
+    {"subdomain": "b.example.com", "ip": "1.1.1.1"},
+    {"subdomain": "A.example.com", "ip": "1.1.1.1"},
+    {"subdomain": "c.example.com", "ip": "2.2.2.2"},
+    {"subdomain": "d.example.com", "ip": None},
+]
+
+
+def test_port_targets_are_unique_ips():
+    plan = ScanPlan(ASSETS)
+    assert [a["ip"] for a in plan.port_targets()] == ["1.1.1.1", "2.2.2.2"]
+
+
+def test_expand_ports_fans_out_to_subdomains():
+    plan = ScanPlan(ASSETS)
+    results = [{"subdomain": a["subdomain"], "ip": a["ip"], "ports": [a["ip"]]}
+               for a in plan.port_targets()]
+    expanded = plan.expand_ports(results)
+    assert [r["subdomain"] for r in expanded] == [
+        "a.example.com", "b.example.com", "A.example.com", "c.example.com"
+    ]
+    assert expanded[1]["ports"] == ["1.1.1.1"]
+
+
+def test_tls_targets_dedupe_ip_and_sni():
+    plan = ScanPlan(ASSETS)
+    targets = plan.tls_targets()
+    assert [t["subdomain"] for t in targets] == [
+        "a.example.com", "b.example.com", "c.example.com", "d.example.com"
+    ]
+    results = [{"subdomain": t["subdomain"], "ip": t["ip"], "n": i} for i, t in enumerate(targets)]
+    results.append({"subdomain": "a.example.com", "ip": "1.1.1.1", "n": 4, "port": 8443})
+    expanded = plan.expand_tls(results)
+    assert len(expanded) == len(ASSETS) + 2
+    assert expanded[3] == {"subdomain": "A.example.com", "ip": "1.1.1.1", "n": 0}
+    assert expanded[4]["port"] == 8443
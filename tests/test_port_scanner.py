@@ -0,0 +1,56 @@
+import sys
+import types
+
+sys.modules.setdefault("nmap", types.ModuleType("nmap"))
+
+from src.Scanners import port_scanner
+
+
+class FakePortScanner:
+    calls = []
+
+    def __init__(self):
+        self._hosts = {}
+
+    def scan(self, hosts, ports):
+        ips = hosts.split()
+        FakePortScanner.calls.append(ips)
+        self._hosts = {
+            ip: FakeHost({80: {"state": "open"}}) for ip in ips if ip != "10.0.0.9"
+        }
+
+    def all_hosts(self):
+        return list(self._hosts)
+
+    def __getitem__(self, ip):
+        return self._hosts[ip]
+
+
+class FakeHost(dict):
+    def __init__(self, tcp):
+        super().__init__(tcp=tcp)
+
+    def all_protocols(self):
+        return ["tcp"]
+
+
+def test_scan_ports_batches_unique_ips(monkeypatch):
+    FakePortScanner.calls = []
+    monkeypatch.setattr(port_scanner.nmap, "PortScanner", FakePortScanner, raising=False)
+    assets = [
+        {"subdomain": "a.example.com", "ip": "10.0.0.1"},
+        {"subdomain": "b.example.com", "ip": "10.0.0.1"},
+        {"subdomain": "c.example.com", "ip": "10.0.0.2"},
+        {"subdomain": "d.example.com", "ip": "10.0.0.9"},
+        {"subdomain": "e.example.com", "ip": None},
+    ]
+
+    results = port_scanner.scan_ports(assets, ports="80", workers=2, batch_size=2)
+
+    scanned = sorted(ip for call in FakePortScanner.calls for ip in call)
+    assert scanned == ["10.0.0.1", "10.0.0.2", "10.0.0.9"]
+    assert [r["subdomain"] for r in results] == [
+        "a.example.com", "b.example.com", "c.example.com", "d.example.com"
+    ]
+    assert results[1]["ports"] == [{"port": 80, "protocol": "tcp", "state": "open"}]
+    assert "error" in results[3]
@@ -0,0 +1,34 @@
+import os
+import sys
+import types
+
+sys.modules.setdefault("numpy", types.ModuleType("numpy"))
+sys.modules.setdefault("joblib", types.ModuleType("joblib"))
+
+from src.ML import risk_model
+from src.utils import helpers
+
+
+def test_load_json_keeps_only_the_latest_version_of_each_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(risk_model, "_records", {})
+    loads = []
+    load_records = helpers.load_records
+    monkeypatch.setattr(risk_model.helpers, "load_records",
+                        lambda path, default=None: loads.append(path) or load_records(path, default))
+    path = tmp_path / "ports.json"
+    helpers.save_json([{"ip": "1.1.1.1"}], path)
+
+    first = risk_model.load_json(path)
+    assert risk_model.load_json(path) is first
+    assert len(loads) == 1
+
+    helpers.save_json([{"ip": "2.2.2.2"}], path)
+    os.utime(path, ns=(0, 1))
+    assert risk_model.load_json(path) == [{"ip": "2.2.2.2"}]
+    assert len(risk_model._records) == 1
+
+    for i in range(risk_model.RECORDS_CACHE_FILES):
+        helpers.save_json([], tmp_path / f"other{i}.json")
+        risk_model.load_json(tmp_path / f"other{i}.json")
+    assert str(path) not in risk_model._records
+    assert len(risk_model._records) == risk_model.RECORDS_CACHE_FILES
@@ -1,3 +1,4 @@
+import contextlib
 import sys
 import types
 
@@ -30,17 +31,18 @@ sys.modules.setdefault("Wappalyzer", wap_module)
 from src.Scanners import run_scanners
 
 
-def test_run_all_returns_expected_keys(monkeypatch):
+def test_run_all_returns_expected_keys(monkeypatch, tmp_path):
     # Patch scanner functions to avoid heavy operations
+    monkeypatch.setattr(run_scanners, "OUTPUT_DIR", str(tmp_path))
     monkeypatch.setattr(run_scanners, "run_sublist3r", lambda domain: ["a." + domain])
     monkeypatch.setattr(run_scanners, "resolve_subdomains", lambda subs: [{"subdomain": subs[0], "ip": "1.1.1.1"}])
-    monkeypatch.setattr(run_scanners, "scan_ports", lambda assets, ports="1-100": [
+    monkeypatch.setattr(run_scanners, "scan_ports", lambda assets, ports="1-100", workers=1, on_result=None: [
         {"subdomain": assets[0]["subdomain"], "ports": []}
     ])
-    monkeypatch.setattr(run_scanners, "scan_ssl", lambda assets: [
-        {"subdomain": assets[0]["subdomain"], "ssl": True}
+    monkeypatch.setattr(run_scanners, "scan_ssl", lambda assets, port_results=None, port_feed=None, on_result=None: [
+        {"subdomain": assets[0]["subdomain"], "ip": assets[0]["ip"], "ssl": True}
     ])
-    monkeypatch.setattr(run_scanners, "detect_technologies", lambda doms, workers=1: [
+    monkeypatch.setattr(run_scanners, "detect_technologies", lambda doms, workers=1, addresses=None, analysis_pool=None, on_result=None: [
         {"subdomain": doms[0], "technologies": []}
     ])
 
@@ -63,3 +65,456 @@ def test_run_all_returns_expected_keys(monkeypatch):
     # ensure save_json called for each prefix
     assert set(saved.keys()) == {"assets", "ports", "ssl_results", "tech_stack"}
 
+
+
+def test_run_all_stream_matches_batch_output(monkeypatch, tmp_path):
+    from src.Scanners import pipeline
+
+    monkeypatch.setattr(run_scanners, "OUTPUT_DIR", str(tmp_path))
+    assets = [
+        {"subdomain": "a.example.com", "ip": "1.1.1.1", "ips": ["1.1.1.1"]},
+        {"subdomain": "b.example.com", "ip": "1.1.1.1", "ips": ["1.1.1.1"]},
+        {"subdomain": "c.example.com", "ip": None, "ips": []},
+    ]
+
+    async def fake_resolve_stream(subdomains):
+        for asset in reversed(assets):
+            yield asset
+
+    async def fake_check(item, port=443):
+        return {"subdomain": item["subdomain"], "ip": item["ip"], "port": port}
+
+    async def fake_tech(session, domain, wappalyzer, timeout, executor=None, planner=None):
+        return {"subdomain": domain, "technologies": []}
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    batches = []
+
+    def fake_batch(ips, ports):
+        batches.append(ips)
+        return {ip: [{"port": 993, "protocol": "tcp", "state": "open"}] for ip in ips}
+
+    monkeypatch.setattr(run_scanners, "run_sublist3r", lambda domain: [a["subdomain"] for a in assets])
+    monkeypatch.setattr(pipeline, "resolve_stream", fake_resolve_stream)
+    monkeypatch.setattr(pipeline, "check_asset_async", fake_check)
+    monkeypatch.setattr(pipeline, "scan_domain_async", fake_tech)
+    monkeypatch.setattr(pipeline, "create_session", lambda workers, planner=None: FakeSession())
+    monkeypatch.setattr(pipeline, "get_wappalyzer", DummyWappalyzer)
+    monkeypatch.setattr(pipeline, "create_analysis_pool", lambda workers: None)
+    monkeypatch.setattr(pipeline.port_scanner, "scan_batch", fake_batch)
+
+    saved = {}
+
+    def fake_save(domain, prefix, data):
+        saved[prefix] = data
+        return f"{prefix}.json"
+
+    monkeypatch.setattr(run_scanners, "save_json", fake_save)
+
+    run_scanners.run_all("example.com", ports="80", workers=2, stream=True)
+
+    assert batches == [["1.1.1.1"]]
+    assert [a["subdomain"] for a in saved["assets"]] == [a["subdomain"] for a in assets]
+    assert [p["subdomain"] for p in saved["ports"]] == ["a.example.com", "b.example.com"]
+    assert [(s["subdomain"], s["port"]) for s in saved["ssl_results"]["subdomains"]] == [
+        ("a.example.com", 443), ("a.example.com", 993),
+        ("b.example.com", 443), ("b.example.com", 993),
+        ("c.example.com", 443),
+    ]
+    assert [t["subdomain"] for t in saved["tech_stack"]] == [a["subdomain"] for a in assets]
+
+
+def test_run_all_resumes_from_journal(monkeypatch, tmp_path):
+    import pytest
+
+    monkeypatch.setattr(run_scanners, "OUTPUT_DIR", str(tmp_path))
+    resolved = [
+        {"subdomain": "a.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "b.example.com", "ip": "2.2.2.2"},
+    ]
+    scanned = {"ports": [], "ssl": [], "tech": []}
+
+    def fake_ports(assets, ports="1-100", workers=1, on_result=None):
+        records = []
+        for asset in assets:
+            scanned["ports"].append(asset["ip"])
+            records.append({"subdomain": asset["subdomain"], "ip": asset["ip"], "ports": []})
+            on_result(records[-1])
+            if crash and asset["ip"] == "1.1.1.1":
+                raise KeyboardInterrupt
+        return records
+
+    def fake_ssl(assets, port_results=None, port_feed=None, on_result=None):
+        scanned["ssl"].extend(a["subdomain"] for a in assets)
+        return [{"subdomain": a["subdomain"], "ip": a["ip"], "port": 443} for a in assets]
+
+    def fake_tech(doms, workers=1, addresses=None, analysis_pool=None, on_result=None):
+        scanned["tech"].extend(doms)
+        return [{"subdomain": d, "technologies": []} for d in doms]
+
+    saved = {}
+
+    def fake_save(domain, prefix, data):
+        saved[prefix] = data
+        return f"{prefix}.json"
+
+    monkeypatch.setattr(run_scanners, "run_sublist3r", lambda domain: [a["subdomain"] for a in resolved])
+    monkeypatch.setattr(run_scanners, "resolve_subdomains", lambda subs: resolved)
+    monkeypatch.setattr(run_scanners, "scan_ports", fake_ports)
+    monkeypatch.setattr(run_scanners, "scan_ssl", fake_ssl)
+    monkeypatch.setattr(run_scanners, "detect_technologies", fake_tech)
+    monkeypatch.setattr(run_scanners, "save_json", fake_save)
+
+    crash = True
+    with pytest.raises(KeyboardInterrupt):
+        run_scanners.run_all("example.com", workers=1)
+    journal = tmp_path / "example.com_journal.jsonl"
+    assert journal.exists()
+
+    crash = False
+    saved.clear()
+    monkeypatch.setattr(run_scanners, "resolve_subdomains", lambda subs: pytest.fail("re-resolved"))
+    for done in scanned.values():
+        done.clear()
+    run_scanners.run_all("example.com", workers=1, resume=True)
+
+    assert scanned["ports"] == ["2.2.2.2"]
+    assert [(p["subdomain"], p["ip"]) for p in saved["ports"]] == [
+        ("a.example.com", "1.1.1.1"), ("b.example.com", "2.2.2.2"),
+    ]
+    assert not journal.exists()
+
+
+def test_resume_probes_journaled_tls_ports_of_partly_checked_ips(monkeypatch, tmp_path):
+    from src.Scanners.checkpoint import Journal, journal_path
+    from src.Scanners.ssl_checker import open_tls_ports
+
+    monkeypatch.setattr(run_scanners, "OUTPUT_DIR", str(tmp_path))
+    asset = {"subdomain": "a.example.com", "ip": "1.1.1.1"}
+    ports = [{"port": 443, "protocol": "tcp", "state": "open"},
+             {"port": 993, "protocol": "tcp", "state": "open"}]
+    journal = Journal(journal_path("example.com", tmp_path))
+    journal.record_assets([asset])
+    journal.record("ports", {**asset, "ports": ports})
+    journal.record("ssl", {**asset, "port": 443})
+    journal.close()
+    probed = []
+
+    def fake_ssl(assets, port_results=None, port_feed=None, on_result=None):
+        extra = open_tls_ports(port_results)
+        probed.extend((a["subdomain"], port) for a in assets
+                      for port in [443] + extra.get(a["ip"], []))
+        return [{**a, "port": port} for a in assets for port in [443] + extra.get(a["ip"], [])]
+
+    saved = {}
+    monkeypatch.setattr(run_scanners, "scan_ports", lambda assets, **kw: [])
+    monkeypatch.setattr(run_scanners, "scan_ssl", fake_ssl)
+    monkeypatch.setattr(run_scanners, "detect_technologies", lambda doms, **kw: [])
+    monkeypatch.setattr(run_scanners, "save_json",
+                        lambda domain, prefix, data: saved.setdefault(prefix, data))
+
+    run_scanners.run_all("example.com", workers=1, resume=True)
+
+    assert probed == [("a.example.com", 443), ("a.example.com", 993)]
+    assert [s["port"] for s in saved["ssl_results"]["subdomains"]] == [443, 993]
+
+
+def test_incremental_run_probes_carried_tls_ports_of_stale_ssl_hosts(monkeypatch, tmp_path):
+    from datetime import datetime, timedelta
+
+    from src.Scanners.ssl_checker import open_tls_ports
+    from src.utils import helpers
+
+    monkeypatch.setattr(run_scanners, "OUTPUT_DIR", str(tmp_path))
+    asset = {"subdomain": "mail.example.com", "ip": "1.1.1.1"}
+    stamp = (datetime.now() - timedelta(hours=1)).strftime("%Y%m%d_%H%M%S")
+    ports = [{"port": 993, "protocol": "tcp", "state": "open"}]
+    helpers.save_json([asset], tmp_path / f"example.com_assets_{stamp}.json")
+    helpers.save_json([{**asset, "ports": ports}], tmp_path / f"example.com_ports_{stamp}.json")
+    helpers.save_json([{**asset, "port": 443, "error": "timed out"}, {**asset, "port": 993}],
+                      tmp_path / f"example.com_ssl_results_{stamp}.json")
+    probed = []
+
+    def fake_ssl(assets, port_results=None, port_feed=None, on_result=None):
+        extra = open_tls_ports(port_results)
+        probed.extend((a["subdomain"], port) for a in assets
+                      for port in [443] + extra.get(a["ip"], []))
+        return [{**a, "port": port} for a in assets for port in [443] + extra.get(a["ip"], [])]
+
+    saved = {}
+    monkeypatch.setattr(run_scanners, "run_sublist3r", lambda domain: [asset["subdomain"]])
+    monkeypatch.setattr(run_scanners, "resolve_subdomains", lambda subs: [dict(asset)])
+    monkeypatch.setattr(run_scanners, "scan_ports", lambda assets, **kw: [])
+    monkeypatch.setattr(run_scanners, "scan_ssl", fake_ssl)
+    monkeypatch.setattr(run_scanners, "detect_technologies", lambda doms, **kw: [])
+    monkeypatch.setattr(run_scanners, "save_json",
+                        lambda domain, prefix, data: saved.setdefault(prefix, data))
+
+    run_scanners.run_all("example.com", workers=1, incremental=True)
+
+    assert probed == [("mail.example.com", 443), ("mail.example.com", 993)]
+    assert [s["port"] for s in saved["ssl_results"]["subdomains"]] == [443, 993]
+
+
+def test_load_domains_skips_comments_and_repeats(tmp_path):
+    path = tmp_path / "domains.txt"
+    path.write_text("# customers\nexample.com\n\nExample.com\nexample.org  # second\n")
+
+    assert run_scanners.load_domains(path) == ["example.com", "example.org"]
+
+
+def test_run_batch_shares_pool_and_reports_failures(monkeypatch):
+    pool = contextlib.nullcontext()
+    calls = []
+
+    def fake_run_all(domain, analysis_pool=None, **options):
+        calls.append((domain, analysis_pool, options))
+        if domain == "bad.com":
+            raise RuntimeError("boom")
+        return {"assets": f"{domain}_assets.json"}
+
+    monkeypatch.setattr(run_scanners, "run_all", fake_run_all)
+    monkeypatch.setattr(run_scanners, "create_analysis_pool", lambda workers: pool)
+
+    results = run_scanners.run_batch(["a.com", "bad.com", "b.com"], parallel=2, ports="80")
+
+    assert list(results) == ["a.com", "bad.com", "b.com"]
+    assert results["a.com"] == {"assets": "a.com_assets.json"}
+    assert results["bad.com"] == {"error": "boom"}
+    assert all(shared is pool and options == {"ports": "80"} for _, shared, options in calls)
+
+
+def test_split_units_keeps_ip_groups_together():
+    resolved = [
+        {"subdomain": "a.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "b.example.com", "ip": "2.2.2.2"},
+        {"subdomain": "c.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "d.example.com", "ip": None},
+    ]
+
+    units = run_scanners.split_units(resolved, unit_size=1)
+
+    assert [[a["subdomain"] for a in unit] for unit in units] == [
+        ["a.example.com", "c.example.com"], ["b.example.com"], ["d.example.com"],
+    ]
+
+
+def test_distributed_run_merges_worker_results(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    from src.utils import serializer
+    from src.utils.work_queue import WorkQueue
+
+    resolved = [
+        {"subdomain": "a.example.com", "ip": "1.1.1.1"},
+        {"subdomain": "b.example.com", "ip": "2.2.2.2"},
+        {"subdomain": "c.example.com", "ip": "1.1.1.1"},
+    ]
+
+    def fake_stages(assets, ports, workers, engine, skip=None, analysis_pool=None,
+                    known_ports=None):
+        known.extend(record["ip"] for record in known_ports)
+        skipped.update((a["subdomain"], bool(skip and skip("tech", a))) for a in assets)
+        if assets[0]["ip"] == "2.2.2.2" and not failed:
+            failed.append(True)
+            raise RuntimeError("flaky")
+        names = [asset["subdomain"] for asset in assets]
+        return {
+            "ports": [{"subdomain": n, "ports": [], "engine": engine} for n in names],
+            "ssl": [{"subdomain": n} for n in names],
+            "tech": [{"subdomain": n, "technologies": []} for n in names],
+        }
+
+    failed = []
+    skipped = set()
+    known = []
+    monkeypatch.setattr(run_scanners, "_run_batch_stages", fake_stages)
+    monkeypatch.setattr(run_scanners, "create_analysis_pool", lambda workers: None)
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+
+    results = {}
+    coordinator = threading.Thread(target=lambda: results.update(
+        run_scanners._run_distributed_stages(queue, "job", resolved, "80", 1, "async",
+                                             skip=lambda stage, a: a["subdomain"] == "b.example.com",
+                                             known_ports=[{"subdomain": "b.example.com",
+                                                           "ip": "2.2.2.2", "ports": []}],
+                                             unit_size=1, poll=0.01)
+    ))
+    coordinator.start()
+    while not queue.counts("job"):
+        time.sleep(0.01)
+    assert run_scanners.run_worker(queue, "w1", poll=0.01, exit_when_idle=True) == 2
+    coordinator.join()
+
+    assert [r["subdomain"] for r in results["ports"]] == [
+        "a.example.com", "b.example.com", "c.example.com",
+    ]
+    assert results["ports"][0]["engine"] == "async"
+    assert failed == [True]
+    assert skipped == {("a.example.com", False), ("b.example.com", True), ("c.example.com", False)}
+    assert known == ["2.2.2.2", "2.2.2.2"]  # the failed unit's retry gets them too
+    # Only the unit holding b.example.com carries skip entries
+    payloads = [serializer.loads(row[0]) for row in queue._conn.execute("SELECT payload FROM units")]
+    assert [p["skip"] for p in payloads] == [
+        {}, {"ports": ["b.example.com"], "ssl": ["b.example.com"], "tech": ["b.example.com"]},
+    ]
+
+
+def test_batch_stages_stream_port_records_to_ssl(monkeypatch):
+    fed = []
+
+    def fake_ports(assets, ports="1-100", workers=1, on_result=None):
+        records = [{"subdomain": a["subdomain"], "ip": a["ip"], "ports": []} for a in assets]
+        for record in records:
+            on_result(record)
+        return records
+
+    def fake_ssl(assets, port_results=None, port_feed=None, on_result=None):
+        fed.extend(port_feed)  # ends once the port scan has finished
+        return [{"subdomain": a["subdomain"], "ip": a["ip"], "port": 443} for a in assets]
+
+    monkeypatch.setattr(run_scanners, "scan_ports", fake_ports)
+    monkeypatch.setattr(run_scanners, "scan_ssl", fake_ssl)
+    monkeypatch.setattr(run_scanners, "detect_technologies",
+                        lambda doms, workers=1, addresses=None, analysis_pool=None, on_result=None: [])
+    resolved = [{"subdomain": "a.example.com", "ip": "1.1.1.1"},
+                {"subdomain": "b.example.com", "ip": "2.2.2.2"}]
+
+    results = run_scanners._run_batch_stages(resolved, "1-10", 1, "nmap")
+
+    assert [record["ip"] for record in fed] == ["1.1.1.1", "2.2.2.2"]
+    assert [record["subdomain"] for record in results["ssl"]] == ["a.example.com", "b.example.com"]
+
+
+def test_pipeline_fails_instead_of_hanging_when_a_stage_dies(monkeypatch):
+    import asyncio
+
+    import pytest
+
+    from src.Scanners import pipeline
+
+    async def fake_resolve_stream(subdomains):
+        for name in subdomains:
+            yield {"subdomain": name, "ip": None, "ips": []}
+
+    async def fake_check(item, port=443):
+        return {"subdomain": item["subdomain"], "ip": item["ip"], "port": port}
+
+    async def broken_tech(session, domain, wappalyzer, timeout, executor=None, planner=None):
+        raise RuntimeError("tech stage crashed")
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(pipeline, "resolve_stream", fake_resolve_stream)
+    monkeypatch.setattr(pipeline, "check_asset_async", fake_check)
+    monkeypatch.setattr(pipeline, "scan_domain_async", broken_tech)
+    monkeypatch.setattr(pipeline, "create_session", lambda workers, planner=None: FakeSession())
+    monkeypatch.setattr(pipeline, "get_wappalyzer", DummyWappalyzer)
+    names = [f"n{i}.example.com" for i in range(20)]
+
+    async def scan():
+        await asyncio.wait_for(
+            pipeline.run_pipeline(names, workers=2, queue_size=1, analysis_pool=object()), 5
+        )
+
+    with pytest.raises(RuntimeError, match="tech stage crashed"):
+        asyncio.run(scan())
+
+
+def test_pipeline_probes_carried_tls_ports_of_skipped_ips(monkeypatch):
+    import asyncio
+
+    from src.Scanners import pipeline
+
+    addresses = {"a.example.com": "1.1.1.1", "b.example.com": "2.2.2.2"}
+
+    async def fake_resolve_stream(subdomains):
+        for name in subdomains:
+            yield {"subdomain": name, "ip": addresses[name], "ips": [addresses[name]]}
+
+    async def fake_check(item, port=443):
+        return {"subdomain": item["subdomain"], "ip": item["ip"], "port": port}
+
+    async def fake_tech(session, domain, wappalyzer, timeout, executor=None, planner=None):
+        return {"subdomain": domain, "technologies": []}
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    def open_ports(*numbers):
+        return [{"port": n, "protocol": "tcp", "state": "open"} for n in numbers]
+
+    monkeypatch.setattr(pipeline, "resolve_stream", fake_resolve_stream)
+    monkeypatch.setattr(pipeline, "check_asset_async", fake_check)
+    monkeypatch.setattr(pipeline, "scan_domain_async", fake_tech)
+    monkeypatch.setattr(pipeline, "create_session", lambda workers, planner=None: FakeSession())
+    monkeypatch.setattr(pipeline, "get_wappalyzer", DummyWappalyzer)
+    monkeypatch.setattr(pipeline.port_scanner, "scan_batch",
+                        lambda ips, ports: {ip: open_ports(465) for ip in ips})
+    known = [{"subdomain": "a.example.com", "ip": "1.1.1.1", "ports": open_ports(443, 993)},
+             {"subdomain": "b.example.com", "ip": "2.2.2.2", "ports": open_ports(993)}]
+
+    results = asyncio.run(pipeline.run_pipeline(
+        list(addresses), workers=2,
+        skip=lambda stage, asset: stage == "ports" and asset["ip"] == "1.1.1.1",
+        analysis_pool=object(), known_ports=known,
+    ))
+
+    # The rescanned IP uses its new port record, not the carried one
+    assert sorted((r["subdomain"], r["port"]) for r in results["ssl"]) == [
+        ("a.example.com", 443), ("a.example.com", 993),
+        ("b.example.com", 443), ("b.example.com", 465),
+    ]
+
+
+def test_pipeline_passes_its_timeout_to_the_tech_stage(monkeypatch):
+    import asyncio
+
+    from src.Scanners import pipeline
+
+    async def fake_resolve_stream(subdomains):
+        for name in subdomains:
+            yield {"subdomain": name, "ip": None, "ips": []}
+
+    async def fake_check(item, port=443):
+        return {"subdomain": item["subdomain"], "ip": item["ip"], "port": port}
+
+    timeouts = []
+
+    async def fake_tech(session, domain, wappalyzer, timeout, executor=None, planner=None):
+        timeouts.append(timeout)
+        return {"subdomain": domain, "technologies": []}
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(pipeline, "resolve_stream", fake_resolve_stream)
+    monkeypatch.setattr(pipeline, "check_asset_async", fake_check)
+    monkeypatch.setattr(pipeline, "scan_domain_async", fake_tech)
+    monkeypatch.setattr(pipeline, "create_session", lambda workers, planner=None: FakeSession())
+    monkeypatch.setattr(pipeline, "get_wappalyzer", DummyWappalyzer)
+
+    asyncio.run(pipeline.run_pipeline(["a.example.com"], workers=1, analysis_pool=object(),
+                                      timeout=7))
+
+    assert timeouts == [7]
@@ -0,0 +1,29 @@
+from src.utils.scheduler import RateScheduler, TokenBucket
+
+
+def test_token_bucket_burst_then_rate():
+    bucket = TokenBucket(rate=10, burst=2, now=0.0)
+    assert bucket.reserve(0.0) == 0.0
+    assert bucket.reserve(0.0) == 0.0
+    assert bucket.reserve(0.0) == 0.1
+    assert round(bucket.reserve(0.0), 3) == 0.2
+    # refilled tokens pay back earlier reservations first
+    assert round(bucket.reserve(0.3), 3) == 0.0
+
+
+def test_scheduler_limits_each_ip_independently():
+    scheduler = RateScheduler(global_rate=None, per_ip_rate=10, per_ip_burst=1)
+    assert scheduler.reserve("10.0.0.1") == 0.0
+    assert scheduler.reserve("10.0.0.1") > 0.0
+    assert scheduler.reserve("10.0.0.2") == 0.0
+
+
+def test_scheduler_global_limit_spans_ips():
+    scheduler = RateScheduler(global_rate=1, per_ip_rate=None)
+    assert scheduler.reserve("10.0.0.1") == 0.0
+    assert scheduler.reserve("10.0.0.2") > 0.0
+
+
+def test_disabled_scheduler_never_waits():
+    scheduler = RateScheduler(global_rate=0, per_ip_rate=0)
+    assert all(scheduler.reserve("10.0.0.1") == 0.0 for _ in range(100))
@@ -0,0 +1,111 @@
+import ssl
+import sys
+import types
+
+import pytest
+
+sys.modules.setdefault("pytz", types.ModuleType("pytz"))
+dateutil = types.ModuleType("dateutil")
+parser = types.ModuleType("parser")
+parser.parse = lambda x: x
+dateutil.parser = parser
+sys.modules.setdefault("dateutil", dateutil)
+
+from src.Scanners import ssl_checker
+
+
+SELF_SIGNED_PEM = """\
+-----BEGIN CERTIFICATE-----
+MIIDFTCCAf2gAwIBAgIUdrFj3ezN+jFZJA6VCprSt9z4pZIwDQYJKoZIhvcNAQEL
+BQAwGjEYMBYGA1UEAwwPc2VsZnNpZ25lZC50ZXN0MB4XDTI2MTAxODE1MjMxNFoX
+DTI2MTAxOTE1MjMxNFowGjEYMBYGA1UEAwwPc2VsZnNpZ25lZC50ZXN0MIIBIjAN
+BgkqhkiG9w0BAQEFAAOCAQ8AMIIBCgKCAQEAqOFeX1clPVxkuhzC2hc8QwMhj0mn
+gTGpEU2m4rxrgST8ARY4kYkjUYx8YnJem/pQCySrgiMeiODJ9zA/Jl5j5NHVg/Uo
+CShP86XmdXNeQn3foZ6Tg18r9nQD3juB/7KaGfpjfKuDbmH3E+iTZF0+Y1IQ3kzN
+nsea2+tq6GY0WtwD5dnhKgF/gGHBdrb9YrxmK5U1e5afsrUraAVknVG20WUArUfj
+vJh6QZcfwkX5+Lr5om9sJkm5GyAEfLP85NpaOwdODmCabR501HxhEbo8WvDKipzz
+p9U4WOqRK9vVKZErymlEPBqRvSur/8bs07UXs4KH2R5yMkuw28xoR5nSewIDAQAB
+o1MwUTAdBgNVHQ4EFgQU5y9dCtSdgBiSJs1yIG9frh3Dz8YwHwYDVR0jBBgwFoAU
+5y9dCtSdgBiSJs1yIG9frh3Dz8YwDwYDVR0TAQH/BAUwAwEB/zANBgkqhkiG9w0B
+AQsFAAOCAQEAZskvl43cO/1i2W/bWsjyIYOUFd2aC1ZGjnuOHeAaJa3zNTU4KzHQ
+dDS9toSOYUIX16cUVpy/hqs3/kxn1wvFDDGdQBNlS1aOACEiW8eNV8ljP1mX/Dua
+mitVOfW3VEhQOpZoxNQSIZBJw7Bjvxk4MFfr9pFSUz/+aPt7G95/EC9QsfPPL5mt
++115Tyes6FEx07SurGdihpuMGNymRT012cbpXhTIc00ANtMEBxgjLcMvwniOFfGZ
+PevcaGlft0mAMF/wOP5KT6jERyum0eUc3rOJz8DS8VjHjKcUbj5xb6SafbvSRQn3
+I6IkOBxdzb0Im8fqqSnHdYEXd0GkKWGglQ==
+-----END CERTIFICATE-----
+"""
+
+
+def test_decode_der_certificate_round_trip():
+    der = ssl.PEM_cert_to_DER_cert(SELF_SIGNED_PEM)
+    cert = ssl_checker.decode_der_certificate(der)
+    assert dict(x[0] for x in cert["subject"]) == {"commonName": "selfsigned.test"}
+    assert cert["notAfter"]
+
+
+def test_decode_der_certificate_matches_the_stdlib_decoder(monkeypatch):
+    pytest.importorskip("cryptography")
+    der = ssl.PEM_cert_to_DER_cert(SELF_SIGNED_PEM)
+    decoded = ssl_checker.decode_der_certificate(der)
+
+    monkeypatch.setattr(ssl_checker, "x509", None)
+    assert decoded == ssl_checker.decode_der_certificate(der)
+
+
+def test_decode_der_certificate_without_a_decoder(monkeypatch):
+    monkeypatch.setattr(ssl_checker, "x509", None)
+    monkeypatch.delattr(ssl._ssl, "_test_decode_cert", raising=False)
+    with pytest.raises(RuntimeError, match="cryptography"):
+        ssl_checker.decode_der_certificate(ssl.PEM_cert_to_DER_cert(SELF_SIGNED_PEM))
+
+
+def test_parse_certificate_info_parses_each_fingerprint_once(monkeypatch):
+    from datetime import datetime, timezone
+    from src.Scanners.cert_store import CertificateCache
+
+    calls = []
+
+    def parse(value):
+        calls.append(value)
+        return datetime.strptime(value, "%b %d %H:%M:%S %Y %Z").replace(tzinfo=timezone.utc)
+
+    monkeypatch.setattr(ssl_checker.date_parser, "parse", parse)
+    der = ssl.PEM_cert_to_DER_cert(SELF_SIGNED_PEM)
+    cert = ssl_checker.decode_der_certificate(der)
+    cert.update(verified=False, verify_error="self-signed certificate", chain=[der])
+    cache = CertificateCache()
+
+    first = ssl_checker.parse_certificate_info(dict(cert), cache)
+    second = ssl_checker.parse_certificate_info(dict(cert, verified=True), cache)
+
+    assert len(calls) == 1
+    assert first["Fingerprint"] == second["Fingerprint"]
+    assert first["verify_error"] == "self-signed certificate"
+    assert second["verified"] is True and "verify_error" not in second
+
+
+def test_scan_subdomains_checks_443_before_the_port_scan_finishes(monkeypatch):
+    import threading
+
+    checked = []
+    port_scan_done = threading.Event()
+
+    async def fake_check(item, timeout, cache, port):
+        checked.append((item["subdomain"], port, port_scan_done.is_set()))
+        return {"subdomain": item["subdomain"], "ip": item["ip"], "port": port}
+
+    def port_feed():
+        # The port scan is still running while 443 is checked
+        while not checked:
+            threading.Event().wait(0.01)
+        port_scan_done.set()
+        yield {"ip": "1.1.1.1", "ports": [{"port": 993, "protocol": "tcp", "state": "open"}]}
+
+    monkeypatch.setattr(ssl_checker, "check_asset_async", fake_check)
+    assets = [{"subdomain": "mail.example.com", "ip": "1.1.1.1"}]
+
+    results = ssl_checker.scan_subdomains(assets, port_feed=port_feed())
+
+    assert checked == [("mail.example.com", 443, False), ("mail.example.com", 993, True)]
+    assert [r["port"] for r in results] == [443, 993]
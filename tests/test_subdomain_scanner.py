@@ -0,0 +1,90 @@
+import socket
+
+from src.Scanners import subdomain_scanner
+from src.utils.dns_cache import DNSCache
+
+
+def fake_getaddrinfo(host, port, family=0, type=0):
+    if host == "missing.example.com":
+        raise socket.gaierror(socket.EAI_NONAME, "NXDOMAIN")
+    if host == "flaky.example.com":
+        raise socket.gaierror(socket.EAI_AGAIN, "Temporary failure in name resolution")
+    return [
+        (socket.AF_INET6, type, 6, "", ("2001:db8::1", 0, 0, 0)),
+        (socket.AF_INET, type, 6, "", ("192.0.2.1", 0)),
+        (socket.AF_INET, type, 6, "", ("192.0.2.1", 0)),
+    ]
+
+
+def test_resolve_subdomains_returns_all_records(monkeypatch):
+    monkeypatch.setattr(subdomain_scanner.socket, "getaddrinfo", fake_getaddrinfo)
+
+    resolved = subdomain_scanner.resolve_subdomains(
+        ["a.example.com", "missing.example.com"], workers=2, timeout=1, cache=False
+    )
+
+    assert resolved == [
+        {"subdomain": "a.example.com", "ip": "192.0.2.1", "ips": ["192.0.2.1", "2001:db8::1"]},
+        {"subdomain": "missing.example.com", "ip": None, "ips": []},
+    ]
+
+
+def test_resolve_subdomains_uses_cache(monkeypatch, tmp_path):
+    calls = []
+
+    def counting_getaddrinfo(host, *args, **kwargs):
+        calls.append(host)
+        return fake_getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(subdomain_scanner.socket, "getaddrinfo", counting_getaddrinfo)
+    cache = DNSCache(tmp_path / "dns.sqlite")
+    names = ["a.example.com", "missing.example.com", "flaky.example.com"]
+
+    first = subdomain_scanner.resolve_subdomains(names, cache=cache)
+    second = subdomain_scanner.resolve_subdomains(names, cache=cache)
+
+    assert first == second
+    # The temporary failure is retried on the second run
+    assert sorted(calls) == sorted(names + ["flaky.example.com"])
+    assert cache.get("A.example.com.") == ["192.0.2.1", "2001:db8::1"]
+    assert cache.get("missing.example.com") == []
+    assert cache.get("flaky.example.com") is None
+
+
+def test_dns_cache_expiry(tmp_path):
+    cache = DNSCache(tmp_path / "dns.sqlite", ttl=-1)
+    cache.set("a.example.com", ["192.0.2.1"])
+    assert cache.get("a.example.com") is None
+    assert cache.purge() == 1
+
+
+def test_lookup_timeout_excludes_time_queued_for_a_worker(monkeypatch):
+    import time
+
+    def slow_getaddrinfo(host, *args, **kwargs):
+        time.sleep(0.05)
+        return fake_getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(subdomain_scanner.socket, "getaddrinfo", slow_getaddrinfo)
+    names = [f"n{i}.example.com" for i in range(40)]
+
+    resolved = subdomain_scanner.resolve_subdomains(names, workers=4, timeout=0.3, cache=False)
+
+    assert all(asset["ip"] == "192.0.2.1" for asset in resolved)
+
+
+def test_timed_out_lookup_keeps_its_worker_until_it_returns(monkeypatch):
+    import time
+
+    def getaddrinfo(host, *args, **kwargs):
+        time.sleep(0.5 if host == "slow.example.com" else 0.01)
+        return fake_getaddrinfo(host, *args, **kwargs)
+
+    monkeypatch.setattr(subdomain_scanner.socket, "getaddrinfo", getaddrinfo)
+
+    resolved = subdomain_scanner.resolve_subdomains(
+        ["slow.example.com", "fast.example.com"], workers=1, timeout=0.25, cache=False,
+    )
+
+    # The second lookup's timeout starts once the stuck thread is free again
+    assert [asset["ip"] for asset in resolved] == [None, "192.0.2.1"]
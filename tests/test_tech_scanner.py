@@ -0,0 +1,201 @@
+import sys
+import types
+
+sys.modules.setdefault("requests", types.ModuleType("requests"))
+wap_module = types.ModuleType("Wappalyzer")
+
+
+class CountingWappalyzer:
+    built = 0
+
+    @staticmethod
+    def latest():
+        CountingWappalyzer.built += 1
+        return CountingWappalyzer()
+
+    def analyze(self, page):
+        return []
+
+
+wap_module.Wappalyzer = CountingWappalyzer
+wap_module.WebPage = object
+sys.modules.setdefault("Wappalyzer", wap_module)
+
+from src.Scanners import tech_scanner
+from src.utils import config
+
+
+def test_get_wappalyzer_builds_once_and_caches_to_disk(monkeypatch, tmp_path):
+    monkeypatch.setattr(tech_scanner, "Wappalyzer", CountingWappalyzer)
+    monkeypatch.setattr(tech_scanner, "_wappalyzer", None)
+    CountingWappalyzer.built = 0
+    cache_path = tmp_path / "wappalyzer.pkl"
+
+    first = tech_scanner.get_wappalyzer(cache_path)
+    assert tech_scanner.get_wappalyzer(cache_path) is first
+    assert CountingWappalyzer.built == 1
+    assert cache_path.exists()
+
+    # A new process would load the pickled copy instead of rebuilding
+    monkeypatch.setattr(tech_scanner, "_wappalyzer", None)
+    assert isinstance(tech_scanner.get_wappalyzer(cache_path), CountingWappalyzer)
+    assert CountingWappalyzer.built == 1
+
+    # A different version stamp forces a rebuild
+    monkeypatch.setattr(tech_scanner, "_wappalyzer", None)
+    monkeypatch.setattr(tech_scanner, "_fingerprint_version", lambda: "other")
+    tech_scanner.get_wappalyzer(cache_path)
+    assert CountingWappalyzer.built == 2
+
+
+def test_read_body_stops_at_limit():
+    import asyncio
+
+    class FakeContent:
+        def __init__(self):
+            self.chunks_read = 0
+
+        async def iter_chunked(self, size):
+            while True:  # endless stream
+                self.chunks_read += 1
+                yield b"x" * 1000
+
+    class FakeResponse:
+        content = FakeContent()
+
+    body = asyncio.run(tech_scanner.read_body(FakeResponse(), max_bytes=2500))
+
+    assert body == b"x" * 2500
+    assert FakeResponse.content.chunks_read == 3
+
+
+def test_fetch_planner_groups_names_by_ip():
+    planner = tech_scanner.FetchPlanner(
+        {"a.example.com": "1.1.1.1", "b.example.com": "2.2.2.2", "c.example.com": "1.1.1.1"}
+    )
+    order = planner.order(["a.example.com", "b.example.com", "c.example.com", "d.example.com"])
+    assert order == ["a.example.com", "c.example.com", "b.example.com", "d.example.com"]
+
+
+def test_deadline_excludes_time_queued_behind_a_shared_ip(monkeypatch):
+    import asyncio
+
+    from src.utils.scheduler import RateScheduler
+
+    class FakeContent:
+        async def iter_chunked(self, size):
+            yield b"<html></html>"
+
+    class FakeResponse:
+        status, headers, charset = 200, {}, "utf-8"
+        content = FakeContent()
+
+        def __init__(self, url):
+            self.url = url
+
+        async def __aenter__(self):
+            await asyncio.sleep(0.05)
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            return FakeResponse(url)
+
+    monkeypatch.setattr(tech_scanner, "get_scheduler", lambda: RateScheduler(None, None))
+    monkeypatch.setattr(tech_scanner, "analyze_page", lambda *page, wappalyzer=None: ["nginx"])
+    domains = [f"n{i}.example.com" for i in range(5 * config.FETCHES_PER_IP)]
+    planner = tech_scanner.FetchPlanner({d: "1.1.1.1" for d in domains})
+
+    async def scan_all():
+        return await asyncio.gather(*(
+            tech_scanner.scan_domain_async(FakeSession(), d, None, 3, deadline=0.15, planner=planner)
+            for d in domains
+        ))
+
+    results = asyncio.run(scan_all())
+
+    assert all(r["technologies"] == ["nginx"] for r in results)
+
+
+def test_detect_technologies_scans_repeated_domains_once(monkeypatch):
+    import warnings
+
+    class FakeSession:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    scanned = []
+
+    async def fake_scan(session, domain, *args):
+        scanned.append(domain)
+        return {"subdomain": domain, "technologies": []}
+
+    monkeypatch.setattr(tech_scanner, "scan_domain_async", fake_scan)
+    monkeypatch.setattr(tech_scanner, "create_session", lambda workers, planner=None: FakeSession())
+    monkeypatch.setattr(tech_scanner, "get_wappalyzer", CountingWappalyzer)
+
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        results = tech_scanner.detect_technologies(
+            ["a.example.com", "b.example.com", "a.example.com"], analysis_workers=0,
+        )
+
+    assert sorted(scanned) == ["a.example.com", "b.example.com"]
+    assert [r["subdomain"] for r in results] == ["a.example.com", "b.example.com", "a.example.com"]
+    assert not [w for w in caught if "never awaited" in str(w.message)]
+
+
+def test_unknown_charset_is_decoded_as_utf8(monkeypatch):
+    import asyncio
+
+    from src.utils.scheduler import RateScheduler
+
+    class FakeContent:
+        async def iter_chunked(self, size):
+            yield "<html>café</html>".encode()
+
+    class FakeResponse:
+        status, headers, charset = 200, {"Content-Type": "text/html; charset=x-bogus"}, "x-bogus"
+        url = "https://a.example.com"
+        content = FakeContent()
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+    class FakeSession:
+        def get(self, url, **kwargs):
+            return FakeResponse()
+
+    pages = []
+    monkeypatch.setattr(tech_scanner, "get_scheduler", lambda: RateScheduler(None, None))
+    monkeypatch.setattr(tech_scanner, "analyze_page",
+                        lambda *page, wappalyzer=None: pages.append(page) or ["nginx"])
+
+    result = asyncio.run(tech_scanner.scan_domain_async(FakeSession(), "a.example.com", None, 3))
+
+    assert result["technologies"] == ["nginx"]
+    assert pages[0][3] == "<html>café</html>"
+
+
+def test_fingerprint_version_uses_the_installed_distribution(monkeypatch):
+    import importlib.metadata
+
+    def fake_version(name):
+        if name != "python-Wappalyzer":
+            raise importlib.metadata.PackageNotFoundError(name)
+        return "0.3.1"
+
+    monkeypatch.setattr(importlib.metadata, "version", fake_version)
+    assert tech_scanner._fingerprint_version().endswith(":python-Wappalyzer-0.3.1")
+
+    monkeypatch.setattr(importlib.metadata, "version", lambda name: "1.0.13")
+    assert tech_scanner._fingerprint_version().endswith(":Wappalyzer-1.0.13")
@@ -0,0 +1,42 @@
+from src.utils.work_queue import WorkQueue
+
+
+def test_lease_complete_and_results(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite")
+    queue.put("job", [{"n": 1}, {"n": 2}])
+
+    first = queue.lease("w1")
+    second = queue.lease("w2")
+    assert (first["payload"], second["payload"]) == ({"n": 1}, {"n": 2})
+    assert queue.lease("w3") is None
+
+    assert queue.complete(second["id"], "w2", {"done": 2})
+    assert queue.complete(first["id"], "w1", {"done": 1})
+    assert queue.results("job") == [{"done": 1}, {"done": 2}]
+    assert queue.counts("job") == {"done": 2}
+
+
+def test_failed_unit_is_retried_then_given_up(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite", max_attempts=2)
+    queue.put("job", [{"n": 1}])
+
+    unit = queue.lease("w1")
+    queue.fail(unit["id"], "w1", "boom")
+    retry = queue.lease("w2")
+    assert retry["attempt"] == 2
+    queue.fail(retry["id"], "w2", "boom again")
+
+    assert queue.lease("w3") is None
+    assert queue.errors("job") == [({"n": 1}, "boom again")]
+
+
+def test_expired_lease_is_handed_to_another_worker(tmp_path):
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_seconds=-1)
+    queue.put("job", [{"n": 1}])
+
+    stale = queue.lease("dead-worker")
+    taken = queue.lease("w2")
+    assert taken["id"] == stale["id"]
+    # the worker that lost its lease can no longer report a result
+    assert not queue.complete(stale["id"], "dead-worker", {})
+    assert queue.complete(taken["id"], "w2", {"ok": True})